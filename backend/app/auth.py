@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+import jwt
+from flask import g, jsonify, request
+
+# What authorization checks need to know about the caller
+Principal = namedtuple('Principal', ['id', 'is_admin', 'is_active'])
+
+
+class AuthError(Exception):
+    """Raised when a request cannot be authenticated."""
+
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class PrincipalCache:
+    """Bounded LRU cache of verified token -> Principal with a TTL.
+
+    Entries are keyed by a hash of the token so raw tokens are never kept
+    in memory, and expire at the earlier of the TTL and the token's own
+    ``exp`` claim. The cache is per process: writes that change a user call
+    invalidate_user(), which only reaches the worker that made the write.
+    Other workers keep the old principal until it expires, so admin
+    principals get the shorter ``admin_ttl`` to bound how long a revoked
+    admin keeps admin rights there.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60, admin_ttl=10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.admin_ttl = admin_ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize, ttl, admin_ttl):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self.admin_ttl = admin_ttl
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.time():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def set(self, key, principal, token_exp=None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + (min(self.ttl, self.admin_ttl) if principal.is_admin else self.ttl)
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (principal, expires_at)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[0].id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[0].id]
+
+
+principals = PrincipalCache()
+
+
+def init_app(app):
+    principals.configure(app.config['AUTH_CACHE_SIZE'], app.config['AUTH_CACHE_TTL'],
+                         app.config['AUTH_CACHE_ADMIN_TTL'])
+
+
+def decode_token(token):
+    """Verify a session token and return its claims."""
+    try:
+        return jwt.decode(token, os.getenv('SECRET_KEY', 'default-secret-key'), algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        raise AuthError('Token has expired')
+    except jwt.InvalidTokenError:
+        raise AuthError('Invalid token')
+
+
+def bearer_token(auth_header):
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return auth_header.split(' ')[1]
+
+
+def token_key(token):
+    """Stable key for a token that does not keep the token itself."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def _active(principal):
+    # Soft-deleted (deactivated) accounts keep their rows but may not act
+    if not principal.is_active:
+        raise AuthError('Account is deactivated', 403)
+    return principal
+
+
+def authenticate(token):
+    """Resolve a bearer token to a Principal, using the cache when possible.
+
+    Raises AuthError for bad tokens, unknown users and deactivated accounts.
+    """
+    from app import db
+    from app.models import User
+
+    key = token_key(token)
+    principal = principals.get(key)
+    if principal is not None:
+        return _active(principal)
+
+    payload = decode_token(token)
+    # Only the columns a Principal needs, so no tag or day loads ride along
+    user = db.session.execute(
+        db.select(User.id, User.is_admin, User.is_active).where(User.id == payload.get('user_id'))
+    ).first()
+    if not user:
+        raise AuthError('User not found', 404)
+
+    principal = Principal(user.id, bool(user.is_admin), bool(user.is_active))
+    principals.set(key, principal, payload.get('exp'))
+    return _active(principal)
+
+
+def invalidate_user(*user_ids):
+    """Forget cached principals for users whose roles or status may have changed."""
+    for user_id in user_ids:
+        principals.invalidate_user(user_id)
+
+
+def login_required(view):
+    """Authenticate the Bearer token and expose the caller as ``g.current_user``."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = bearer_token(request.headers.get('Authorization'))
+        if not token:
+            return jsonify({'error': 'Authorization required'}), 401
+        try:
+            g.current_user = authenticate(token)
+        except AuthError as e:
+            return jsonify({'error': e.message}), e.status
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,288 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, request
+from app import compression, db, replicas, versions
+
+logger = logging.getLogger(__name__)
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type', 'Content-Encoding', 'X-Next-Cursor', 'Link')
+
+
+def _encode(status, headers, body):
+    return json.dumps({'status': status, 'headers': headers}).encode('utf-8') + b'\n' + body
+
+
+def _decode(payload):
+    meta, _, body = payload.partition(b'\n')
+    meta = json.loads(meta)
+    return meta['status'], meta['headers'], body
+
+
+class LRUTier:
+    """In-process LRU of encoded responses."""
+
+    name = 'local'
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            namespace, payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key, namespace, payload, ttl):
+        with self._lock:
+            self._entries[key] = (namespace, payload, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[0] == namespace]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisTier:
+    """Shared tier in Redis. Each namespace keeps a set of its keys for invalidation."""
+
+    name = 'redis'
+
+    def __init__(self, url, prefix='response-cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RESPONSE_CACHE_SHARED_URL is a redis:// URL but the redis package is not installed')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, namespace, payload, ttl):
+        members = f'{self.prefix}ns:{namespace}'
+        pipe = self.client.pipeline()
+        pipe.setex(self.prefix + key, ttl, payload)
+        pipe.sadd(members, self.prefix + key)
+        pipe.expire(members, ttl)
+        pipe.execute()
+
+    def delete_namespace(self, namespace):
+        members = f'{self.prefix}ns:{namespace}'
+        keys = self.client.smembers(members)
+        if keys:
+            self.client.delete(*keys)
+        self.client.delete(members)
+
+    def clear(self):
+        for key in self.client.scan_iter(f'{self.prefix}*'):
+            self.client.delete(key)
+
+
+class SQLiteTier:
+    """Shared tier in a SQLite file, for single-host deployments without Redis."""
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=OFF')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS response_cache ('
+                'key TEXT PRIMARY KEY, namespace TEXT NOT NULL, payload BLOB NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_namespace ON response_cache (namespace)')
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload FROM response_cache WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, namespace, payload, ttl):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, namespace, payload, expires_at) VALUES (?, ?, ?, ?)',
+                (key, namespace, payload, time.time() + ttl)
+            )
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM response_cache WHERE namespace = ? OR expires_at <= ?', (namespace, time.time())
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM response_cache')
+
+
+def shared_tier(url):
+    """Build the shared tier for RESPONSE_CACHE_SHARED_URL (redis://... or sqlite:///path)."""
+    if not url:
+        return None
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisTier(url)
+    if url.startswith('sqlite:///'):
+        return SQLiteTier(url[len('sqlite:///'):])
+    raise ValueError(f'Unsupported RESPONSE_CACHE_SHARED_URL: {url}')
+
+
+class ResponseCache:
+    """Two-tier cache of rendered GET responses.
+
+    Keys combine the namespace's data version, the path and the normalized
+    query string, so a write that bumps the version makes every worker miss
+    on stale entries right away. Writes also call invalidate() so this
+    process and the shared tier drop the old entries instead of letting
+    them age out.
+    """
+
+    def __init__(self):
+        self.tiers = []
+        self.ttl = 300
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def configure(self, lru_size, shared_url, ttl):
+        self.ttl = ttl
+        self.tiers = [LRUTier(lru_size)] if lru_size > 0 else []
+        shared = shared_tier(shared_url)
+        if shared is not None:
+            self.tiers.append(shared)
+        self._stats = {tier.name: {'hits': 0, 'misses': 0} for tier in self.tiers}
+
+    def _count(self, tier, outcome):
+        with self._lock:
+            self._stats[tier.name][outcome] += 1
+
+    def get(self, key, namespace):
+        for index, tier in enumerate(self.tiers):
+            try:
+                payload = tier.get(key)
+            except Exception as e:
+                logger.warning(f"Response cache {tier.name} read failed: {str(e)}")
+                payload = None
+            if payload is None:
+                self._count(tier, 'misses')
+                continue
+            self._count(tier, 'hits')
+            # Promote shared hits into the faster tiers
+            for faster in self.tiers[:index]:
+                faster.set(key, namespace, payload, self.ttl)
+            return payload
+        return None
+
+    def set(self, key, namespace, payload):
+        for tier in self.tiers:
+            try:
+                tier.set(key, namespace, payload, self.ttl)
+            except Exception as e:
+                logger.warning(f"Response cache {tier.name} write failed: {str(e)}")
+
+    def invalidate(self, *namespaces):
+        for tier in self.tiers:
+            for namespace in namespaces:
+                try:
+                    tier.delete_namespace(namespace)
+                except Exception as e:
+                    logger.warning(f"Response cache {tier.name} invalidation failed: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: dict(counts, ratio=round(counts['hits'] / (counts['hits'] + counts['misses']), 4)
+                           if counts['hits'] + counts['misses'] else None)
+                for name, counts in self._stats.items()
+            }
+
+
+response_cache = ResponseCache()
+
+
+def init_app(app):
+    response_cache.configure(
+        app.config['RESPONSE_CACHE_SIZE'],
+        app.config['RESPONSE_CACHE_SHARED_URL'],
+        app.config['RESPONSE_CACHE_TTL']
+    )
+
+
+def request_key(namespace):
+    """Cache key for the current request: namespace, data version, path and sorted non-empty args."""
+    version, _ = versions.snapshot.get(namespace)
+    args = sorted((name, value) for name, value in request.args.items(multi=True) if value != '')
+    query = urlencode(args)
+    return f'{namespace}:{version}:{request.path}' + (f'?{query}' if query else '')
+
+
+def _store(key, namespace, response):
+    headers = [(name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers]
+    response_cache.set(key, namespace, _encode(response.status_code, headers, response.get_data()))
+
+
+def _load(payload):
+    status, headers, body = _decode(payload)
+    return current_app.response_class(body, status=status, headers=headers)
+
+
+def cached(namespace):
+    """Serve a GET view from the response cache; only 200 responses are stored.
+
+    Alongside the plain body, the cache keeps the body as sent to clients
+    accepting each encoding (compressed once it passes COMPRESS_MIN_SIZE),
+    so a hit never compresses again.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Callers pinned to the primary must see their own writes, not cached replica reads
+            if not response_cache.tiers or replicas.pinned_to_primary(db):
+                return view(*args, **kwargs)
+
+            key = request_key(namespace)
+            encoding = compression.negotiate()
+            if encoding:
+                payload = response_cache.get(f'{key}|{encoding}', namespace)
+                if payload is not None:
+                    return _load(payload)
+
+            payload = response_cache.get(key, namespace)
+            if payload is not None:
+                response = _load(payload)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                _store(key, namespace, response)
+
+            if encoding:
+                _store(f'{key}|{encoding}', namespace, compression.compress_response(response, encoding))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,80 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+# Body types worth compressing
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+settings = {'min_size': 1024, 'gzip_level': 6, 'brotli_quality': 5}
+
+
+def available_encodings():
+    """Encodings this process can produce, most preferred first."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate():
+    """The encoding to use for the current request's Accept-Encoding, or None."""
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=settings['brotli_quality'])
+    return gzip.compress(body, compresslevel=settings['gzip_level'], mtime=0)
+
+
+def encoded_etag(etag, encoding):
+    """The strong ETag of the ``encoding`` representation of a resource tagged ``etag``."""
+    return f'{etag}-{encoding}'
+
+
+def identity_etag(etag):
+    """``etag`` without the encoding suffix encoded_etag() adds."""
+    for encoding in ('br', 'gzip'):
+        if etag.endswith(f'-{encoding}'):
+            return etag[:-len(encoding) - 1]
+    return etag
+
+
+def compressible(response):
+    return response.mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def compress_response(response, encoding):
+    """Compress a buffered response in place when it is large enough; return it."""
+    if (encoding is None or response.status_code != 200 or response.direct_passthrough
+            or response.is_streamed or 'Content-Encoding' in response.headers
+            or not compressible(response)):
+        return response
+    body = response.get_data()
+    if len(body) < settings['min_size']:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    settings.update(
+        min_size=app.config['COMPRESS_MIN_SIZE'],
+        gzip_level=app.config['COMPRESS_GZIP_LEVEL'],
+        brotli_quality=app.config['COMPRESS_BROTLI_QUALITY']
+    )
+
+    @app.after_request
+    def compress_body(response):
+        if compressible(response):
+            response.vary.add('Accept-Encoding')
+        compress_response(response, negotiate())
+        # A strong ETag names one representation, so each encoding gets its own
+        encoding = response.headers.get('Content-Encoding')
+        etag, weak = response.get_etag()
+        if etag and not weak and encoding in available_encodings() and not etag.endswith(f'-{encoding}'):
+            response.set_etag(encoded_etag(etag, encoding))
+        return response
@@ -0,0 +1,78 @@
+from collections import defaultdict
+from app import db, search, facets, versions
+from app.models import User, UserTag, UserDay
+
+
+def check_deletions(user_ids, allow_admin=False, chunk_size=1000):
+    """Validate a delete request with one ``SELECT ... IN (...)`` per chunk.
+
+    Returns ``(deletable_ids, errors)``. Errors keep the per-id messages
+    and the order of ``user_ids``; repeated ids are only deleted once.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    found = {}
+    for start in range(0, len(user_ids), chunk_size):
+        rows = db.session.execute(
+            db.select(User.id, User.is_admin, User.email)
+            .where(User.id.in_(user_ids[start:start + chunk_size]))
+        )
+        found.update((row.id, row) for row in rows)
+
+    deletable = []
+    errors = []
+    for user_id in user_ids:
+        row = found.get(user_id)
+        if row is None:
+            errors.append(f'User not found: {user_id}')
+        elif row.is_admin and not allow_admin:
+            # Prevent deletion of admin users by non-admins
+            errors.append(f'Cannot delete admin user: {row.email}')
+        else:
+            deletable.append(user_id)
+    return deletable, errors
+
+
+def delete_users(user_ids):
+    """Delete a chunk of users and everything hanging off them with set-based statements.
+
+    Tag counts are adjusted from the tag rows actually removed, the search
+    entries are dropped and the data versions are bumped. Nothing is
+    committed. Returns the ids that were deleted.
+    """
+    if not user_ids:
+        return []
+    removed_tags = defaultdict(list)
+    for user_id, tag in db.session.execute(
+        db.delete(UserTag).where(UserTag.user_id.in_(user_ids)).returning(UserTag.user_id, UserTag.tag)
+    ):
+        removed_tags[user_id].append(tag)
+    db.session.execute(db.delete(UserDay).where(UserDay.user_id.in_(user_ids)))
+    deleted = list(db.session.execute(
+        db.delete(User).where(User.id.in_(user_ids)).returning(User.id)
+    ).scalars())
+    if not deleted:
+        return []
+
+    search.remove_users(deleted)
+    facets.adjust_tag_counts(removed=removed_tags.values())
+    versions.bump(versions.USERS, versions.TAGS)
+    return deleted
+
+
+def deactivate_users(user_ids):
+    """Soft-delete a chunk of users by clearing ``is_active``; returns the ids updated.
+
+    Rows, tags and search entries stay, so this is one UPDATE however many
+    tags the users carry. The accounts are refused by auth.authenticate()
+    from then on, but still listed with ``isActive: false``. Nothing is
+    committed.
+    """
+    if not user_ids:
+        return []
+    deactivated = list(db.session.execute(
+        db.update(User).where(User.id.in_(user_ids))
+        .values(is_active=False, version=User.version + 1).returning(User.id)
+    ).scalars())
+    if deactivated:
+        versions.bump(versions.USERS)
+    return deactivated
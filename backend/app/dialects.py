@@ -0,0 +1,20 @@
+from app import db
+
+
+def dialect_name():
+    """Name of the database dialect the current session is bound to."""
+    return db.session.get_bind().dialect.name
+
+
+def is_sqlite():
+    return dialect_name() == 'sqlite'
+
+
+def insert(table):
+    """Dialect-specific INSERT supporting ``on_conflict_do_*`` (SQLite and PostgreSQL)."""
+    # Imported here so workers only load the dialect they actually use
+    if is_sqlite():
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert(table)
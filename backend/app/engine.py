@@ -0,0 +1,107 @@
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+
+def engine_options(config, uri=None):
+    """Engine keyword arguments for the database at ``uri`` (default: the main URI).
+
+    PostgreSQL gets a sized QueuePool that pings connections before use and
+    recycles them before server or proxy idle timeouts close them. SQLite is
+    tuned through connection PRAGMAs instead (see init_app), since its pool
+    size barely matters.
+    """
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True
+    }
+
+
+def _gevent_wait_callback(conn, timeout=None):
+    """Wait for psycopg2 I/O through the gevent hub instead of blocking the worker."""
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f'Bad result from poll: {state!r}')
+
+
+def patch_psycopg2_for_gevent():
+    """Make psycopg2 cooperative when running under gevent-patched gunicorn workers.
+
+    psycopg2 talks to the server in C, so monkey-patching sockets does not
+    reach it; without a wait callback one slow query stalls every greenlet
+    in the worker.
+    """
+    try:
+        from gevent import monkey
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    if not monkey.is_module_patched('socket'):
+        return False
+    extensions.set_wait_callback(_gevent_wait_callback)
+    return True
+
+
+def _sqlite_pragmas(config):
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}"
+    ]
+
+
+def configure_engine(engine, config):
+    """Attach per-connection setup to an engine created by Flask-SQLAlchemy."""
+    if engine.dialect.name == 'sqlite':
+        pragmas = _sqlite_pragmas(config)
+
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+    elif engine.dialect.driver == 'psycopg2':
+        if patch_psycopg2_for_gevent():
+            logger.info("psycopg2 wait callback installed for gevent")
+
+
+def pool_stats(engine):
+    """Current state of an engine's connection pool, for sizing it under load."""
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    for name, key in (('size', 'size'), ('checkedin', 'checkedIn'),
+                      ('checkedout', 'checkedOut'), ('overflow', 'overflow')):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[key] = method()
+    timeout = getattr(pool, 'timeout', None)
+    if callable(timeout):
+        stats['timeout'] = timeout()
+    return stats
+
+
+def init_app(app, db):
+    """Hook connection setup into every engine (the main database and any binds)."""
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, app.config)
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import zlib
+from app import db
+from app.models import User
+
+# Same columns, in the same order, that scripts/import_users.py accepts
+EXPORT_COLUMNS = ['email', 'name', 'description', 'tags', 'team', 'available_days', 'links']
+
+# API fields needed to build an export row
+EXPORT_FIELDS = ['email', 'name', 'description', 'tags', 'team', 'availableDays', 'links']
+
+
+def iter_user_batches(batch_size=1000):
+    """Yield users as lists of API dictionaries, one batch at a time.
+
+    Rows come from a single streamed query (``yield_per`` uses a server-side
+    cursor where the driver supports one), so memory use depends on the batch
+    size rather than the table size.
+    """
+    query = (
+        db.select(*User.api_columns(EXPORT_FIELDS))
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for rows in db.session.execute(query).partitions():
+        yield User.rows_to_dicts(rows, EXPORT_FIELDS)
+
+
+def _export_row(user):
+    return {
+        'email': user['email'],
+        'name': user['name'],
+        'description': user['description'] or '',
+        'tags': ';'.join(user['tags']),
+        'team': user['team'] or '',
+        'available_days': ';'.join(user['availableDays']),
+        'links': json.dumps(user['links']) if user['links'] else ''
+    }
+
+
+def csv_chunks(batch_size=1000):
+    """Yield the export as CSV text, one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for users in iter_user_batches(batch_size):
+        writer.writerows(_export_row(user) for user in users)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(batch_size=1000):
+    """Yield the export as newline-delimited JSON, one chunk per batch."""
+    for users in iter_user_batches(batch_size):
+        yield ''.join(json.dumps(_export_row(user)) + '\n' for user in users)
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of text chunks without buffering the whole body."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def brotli_chunks(chunks, quality=5):
+    """Brotli-compress a stream of text chunks without buffering the whole body."""
+    import brotli
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        data = compressor.process(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.finish()
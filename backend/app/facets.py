@@ -0,0 +1,44 @@
+from collections import Counter
+from app import db, dialects
+from app.models import TagFacet, UserTag
+
+
+def adjust_tag_counts(added=(), removed=()):
+    """Apply tag additions and removals to the tag facet counts.
+
+    ``added`` and ``removed`` are iterables of tag lists, one per affected user.
+    Runs on the current session so the counts commit together with the
+    profile changes that caused them.
+    """
+    deltas = Counter()
+    for tags in added:
+        deltas.update(set(tags or []))
+    for tags in removed:
+        deltas.subtract(set(tags or []))
+    deltas = {tag: delta for tag, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    # Upsert so concurrent writers creating the same new tag do not collide
+    insert = dialects.insert(TagFacet.__table__)
+    db.session.execute(
+        insert.on_conflict_do_update(
+            index_elements=['tag'],
+            set_={'user_count': insert.table.c.user_count + insert.excluded.user_count}
+        ),
+        [{'tag': tag, 'user_count': delta} for tag, delta in deltas.items()]
+    )
+    db.session.execute(
+        db.delete(TagFacet).where(TagFacet.tag.in_(list(deltas)), TagFacet.user_count <= 0)
+    )
+
+
+def rebuild_tag_counts():
+    """Recompute every tag facet count from the user_tag table."""
+    db.session.execute(db.delete(TagFacet))
+    db.session.execute(
+        db.insert(TagFacet).from_select(
+            ['tag', 'user_count'],
+            db.select(UserTag.tag, db.func.count(UserTag.user_id)).group_by(UserTag.tag)
+        )
+    )
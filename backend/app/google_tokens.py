@@ -0,0 +1,175 @@
+import logging
+import re
+import threading
+import time
+import jwt
+from jwt import PyJWKSet
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v3/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+
+class SigningKeyCache:
+    """Process-wide cache of a JWKS endpoint's signing keys.
+
+    Keys are kept for the ``max-age`` the server sends in ``Cache-Control``
+    and refreshed in a background thread once they are within
+    ``refresh_margin`` seconds of expiring. Expired keys are still served
+    while that refresh runs (or keeps failing), so verification only waits
+    on the network when there are no keys at all, or when a token is signed
+    with an unknown key id (Google rotated its keys early). Unknown key ids
+    and failed fetches are retried at most every ``min_refresh_interval``
+    seconds, and only one thread fetches at a time.
+    """
+
+    def __init__(self, url=GOOGLE_CERTS_URL, timeout=5, refresh_margin=300,
+                 min_refresh_interval=30, default_max_age=3600):
+        self.url = url
+        self.timeout = timeout
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.default_max_age = default_max_age
+        self._session = None
+        self._keys = {}
+        self._expires_at = 0
+        self._attempted_at = 0
+        self._attempts = 0
+        self._error = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+
+    def configure(self, url):
+        with self._refresh_lock, self._lock:
+            self.url = url
+            self._keys = {}
+            self._expires_at = 0
+            self._attempted_at = 0
+            self._error = None
+
+    @property
+    def session(self):
+        # requests is slow to import, so load it on the first fetch
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            self._session = session
+        return self._session
+
+    def _max_age(self, response):
+        match = MAX_AGE_PATTERN.search(response.headers.get('Cache-Control', ''))
+        return int(match.group(1)) if match else self.default_max_age
+
+    def _fetch(self):
+        session = self.session
+        import requests
+        try:
+            response = session.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            key_set = PyJWKSet.from_dict(response.json())
+        except (requests.RequestException, jwt.PyJWTError) as e:
+            raise ValueError(f"Could not fetch signing keys from {self.url}: {str(e)}")
+        keys = {key.key_id: key for key in key_set.keys if key.public_key_use in ('sig', None)}
+        return keys, self._max_age(response)
+
+    def refresh(self):
+        """Fetch the key set now and replace the cached keys.
+
+        A caller that waited while another thread fetched gets that fetch's
+        keys (or error) instead of fetching again. Raises ValueError when
+        the keys cannot be fetched.
+        """
+        attempts = self._attempts
+        with self._refresh_lock:
+            if self._attempts != attempts:
+                if self._error is not None:
+                    raise ValueError(self._error)
+                return self._keys
+            self._attempted_at = time.time()
+            try:
+                keys, max_age = self._fetch()
+            except ValueError as e:
+                self._error = str(e)
+                raise
+            else:
+                with self._lock:
+                    self._keys = keys
+                    self._expires_at = time.time() + max_age
+                    self._error = None
+            finally:
+                self._attempts += 1
+            return keys
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Background refresh of {self.url} failed: {str(e)}")
+        finally:
+            self._refreshing = False
+
+    def prefetch(self):
+        """Start a background refresh unless one is running or the last one failed too recently."""
+        with self._lock:
+            if self._refreshing or (self._error is not None and
+                                    time.time() - self._attempted_at < self.min_refresh_interval):
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name='jwks-refresh', daemon=True).start()
+
+    def get(self, kid):
+        """Return the signing key for ``kid``, or None if the server does not know it.
+
+        Raises ValueError when there are no cached keys and they cannot be fetched.
+        """
+        now = time.time()
+        keys, expires_at = self._keys, self._expires_at
+        if not keys:
+            if self._error is not None and now - self._attempted_at < self.min_refresh_interval:
+                # The server just failed; do not make every sign-in wait on it again
+                raise ValueError(self._error)
+            keys = self.refresh()
+        elif now >= expires_at - self.refresh_margin:
+            self.prefetch()
+
+        key = keys.get(kid)
+        if key is None and now - self._attempted_at >= self.min_refresh_interval:
+            key = self.refresh().get(kid)
+        return key
+
+
+signing_keys = SigningKeyCache()
+
+
+def init_app(app):
+    signing_keys.configure(app.config['GOOGLE_CERTS_URL'])
+    # Warm the cache so the first sign-in does not wait on Google
+    if app.config.get('GOOGLE_CLIENT_ID'):
+        signing_keys.prefetch()
+
+
+def verify_id_token(credential, client_id):
+    """Verify a Google ID token against the cached signing keys and return its claims.
+
+    Raises ValueError when the token is malformed, expired, signed by an
+    unknown key or issued for another audience or issuer.
+    """
+    try:
+        header = jwt.get_unverified_header(credential)
+        key = signing_keys.get(header.get('kid'))
+        if key is None:
+            raise ValueError(f"Unknown signing key: {header.get('kid')}")
+        claims = jwt.decode(credential, key.key, algorithms=[key.algorithm_name], audience=client_id)
+    except jwt.PyJWTError as e:
+        raise ValueError(str(e))
+
+    if claims.get('iss') not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+    return claims
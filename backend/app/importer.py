@@ -0,0 +1,150 @@
+import json
+import uuid
+from app import db, dialects, search, facets, versions
+from app.models import User, UserTag, UserDay
+from app.models.user_day import days_to_bits
+
+
+def _split(value):
+    """Accept either a list or a ';'-separated string (the CSV format)."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(';') if item.strip()]
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return []
+
+
+def _links(value):
+    """Accept a dict or a JSON object string as stored in CSV files."""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            links = json.loads(value)
+        except ValueError:
+            return {}
+        return links if isinstance(links, dict) else {}
+    return {}
+
+
+def _flag(value):
+    """Parse a boolean column: true/false, or the strings "true", "false", "1" and "0".
+
+    Missing and empty values are False. Raises ValueError for anything else.
+    """
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    if isinstance(value, str) and value.strip().lower() in ('', 'false', '0'):
+        return False
+    if isinstance(value, str) and value.strip().lower() in ('true', '1'):
+        return True
+    raise ValueError(value)
+
+
+def prepare_row(user_data, row_number, allow_admin=False):
+    """Validate one import row and turn it into a user mapping.
+
+    Returns ``(mapping, None)`` on success or ``(None, error)``. Pure Python,
+    so it can run outside the application context.
+    """
+    email = (user_data.get('email') or '').strip()
+    name = (user_data.get('name') or '').strip()
+    if not email:
+        return None, f'Row {row_number}: Email is required'
+    if not name:
+        return None, f'Row {row_number}: Name is required'
+    try:
+        is_admin = _flag(user_data.get('is_admin'))
+    except ValueError:
+        return None, f'Row {row_number}: is_admin must be true or false'
+
+    return {
+        'id': str(uuid.uuid4()),
+        'email': email,
+        'name': name,
+        'description': user_data.get('description') or '',
+        'team': user_data.get('team') or '',
+        'links': _links(user_data.get('links')),
+        'is_active': True,
+        'is_admin': allow_admin and is_admin,
+        'tags': UserTag.normalize(_split(user_data.get('tags'))),
+        'available_days': _split(user_data.get('availableDays') or user_data.get('available_days'))
+    }, None
+
+
+def insert_users(rows):
+    """Insert a chunk of prepared rows with set-based statements.
+
+    ``rows`` is a list of ``(row_number, mapping)`` pairs from prepare_row().
+    Duplicates are found with one ``IN (...)`` query plus an in-memory check
+    within the chunk; the remaining users, their tags and days, search index
+    entries and tag counts are written with one executemany each, and the
+    data versions are bumped. Nothing is
+    committed. Returns ``(inserted_mappings, errors)`` where errors are
+    ``(row_number, message)`` pairs.
+    """
+    errors = []
+    if not rows:
+        return [], errors
+
+    existing = set(db.session.execute(
+        db.select(User.email).where(User.email.in_([mapping['email'] for _, mapping in rows]))
+    ).scalars())
+
+    candidates = []
+    seen = set()
+    for row_number, mapping in rows:
+        email = mapping['email']
+        if email in existing:
+            errors.append((row_number, f'Row {row_number}: Email {email} already exists'))
+        elif email in seen:
+            errors.append((row_number, f'Row {row_number}: Email {email} is duplicated in this import'))
+        else:
+            seen.add(email)
+            candidates.append((row_number, mapping))
+    if not candidates:
+        return [], errors
+
+    # ON CONFLICT DO NOTHING keeps a concurrent import of the same email from
+    # failing the whole chunk; RETURNING tells us which rows actually landed.
+    user_table = User.__table__
+    statement = (
+        dialects.insert(user_table)
+        .on_conflict_do_nothing(index_elements=['email'])
+        .returning(user_table.c.id)
+    )
+    inserted_ids = set(db.session.execute(statement, [
+        {column.name: mapping[column.name] for column in user_table.columns if column.name in mapping}
+        for _, mapping in candidates
+    ]).scalars())
+
+    inserted = []
+    for row_number, mapping in candidates:
+        if mapping['id'] in inserted_ids:
+            inserted.append(mapping)
+        else:
+            errors.append((row_number, f'Row {row_number}: Email {mapping["email"]} already exists'))
+    if not inserted:
+        return [], errors
+
+    tag_rows = [
+        {'user_id': mapping['id'], 'tag': tag, 'position': position}
+        for mapping in inserted for position, tag in enumerate(mapping['tags'])
+    ]
+    if tag_rows:
+        db.session.execute(db.insert(UserTag), tag_rows)
+    day_rows = [
+        {'user_id': mapping['id'], 'day_bitmask': bit}
+        for mapping in inserted for bit in days_to_bits(mapping['available_days'])
+    ]
+    if day_rows:
+        db.session.execute(db.insert(UserDay), day_rows)
+
+    search.index_documents([search.document_for(mapping) for mapping in inserted], replace=False)
+    facets.adjust_tag_counts(added=[mapping['tags'] for mapping in inserted])
+    versions.bump(versions.USERS, versions.TAGS)
+    return inserted, errors
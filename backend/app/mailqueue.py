@@ -0,0 +1,263 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+import click
+from app import db
+from app.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Messages stuck in 'sending' longer than this belong to a sender that died
+STALE_CLAIM_AFTER = timedelta(minutes=5)
+
+
+def enqueue(subject, recipients, html, sender=None):
+    """Add a message to the outbox on the current session.
+
+    The caller commits, so the message is only queued if its transaction
+    succeeds. Call wake() after the commit to start sending right away.
+    """
+    message = OutboxMessage(
+        subject=subject,
+        sender=sender,
+        recipients=list(recipients),
+        html=html,
+        status=OutboxMessage.PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(message)
+    return message
+
+
+class SMTPConnectionPool:
+    """A small pool of persistent SMTP connections.
+
+    Connections are opened on demand, reused across batches and dropped
+    after an error or after sitting idle past ``idle_timeout`` seconds,
+    when most relays have closed them anyway.
+    """
+
+    def __init__(self, config, size=2, idle_timeout=60):
+        self.config = config
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        host = self.config['MAIL_SERVER']
+        port = self.config['MAIL_PORT']
+        timeout = self.config.get('MAIL_TIMEOUT', 30)
+        if self.config.get('MAIL_USE_SSL'):
+            connection = smtplib.SMTP_SSL(host, port, timeout=timeout)
+        else:
+            connection = smtplib.SMTP(host, port, timeout=timeout)
+            if self.config.get('MAIL_USE_TLS'):
+                connection.starttls()
+        if self.config.get('MAIL_USERNAME') and self.config.get('MAIL_PASSWORD'):
+            connection.login(self.config['MAIL_USERNAME'], self.config['MAIL_PASSWORD'])
+        return connection
+
+    def acquire(self):
+        while True:
+            try:
+                connection, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - released_at < self.idle_timeout:
+                return connection
+            self.discard(connection)
+
+    def release(self, connection):
+        self._idle.put((connection, time.monotonic()))
+
+    def discard(self, connection):
+        try:
+            connection.quit()
+        except Exception:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def close(self):
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self.discard(connection)
+
+
+class MailSender:
+    """Delivers queued messages in batches over pooled SMTP connections."""
+
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.batch_size = config['MAIL_BATCH_SIZE']
+        self.max_attempts = config['MAIL_MAX_ATTEMPTS']
+        self.retry_base = config['MAIL_RETRY_BASE_SECONDS']
+        self.retry_max = config['MAIL_RETRY_MAX_SECONDS']
+        self.pool = SMTPConnectionPool(config, size=config['MAIL_POOL_SIZE'])
+        self._executor = ThreadPoolExecutor(max_workers=self.pool.size)
+
+    def _claim(self):
+        """Claim up to one batch of due messages for this sender.
+
+        Each row is claimed with a conditional UPDATE, so concurrent senders
+        in other workers never deliver the same message twice.
+        """
+        now = datetime.utcnow()
+        due = db.or_(
+            db.and_(OutboxMessage.status == OutboxMessage.PENDING, OutboxMessage.next_attempt_at <= now),
+            db.and_(OutboxMessage.status == OutboxMessage.SENDING, OutboxMessage.claimed_at < now - STALE_CLAIM_AFTER)
+        )
+        candidates = db.session.execute(
+            db.select(OutboxMessage.id, OutboxMessage.status)
+            .where(due)
+            .order_by(OutboxMessage.next_attempt_at)
+            .limit(self.batch_size)
+        ).all()
+
+        claimed = []
+        for message_id, status in candidates:
+            result = db.session.execute(
+                db.update(OutboxMessage)
+                .where(OutboxMessage.id == message_id, OutboxMessage.status == status)
+                .values(status=OutboxMessage.SENDING, claimed_at=now)
+            )
+            if result.rowcount:
+                claimed.append(message_id)
+        db.session.commit()
+        if not claimed:
+            return []
+        return OutboxMessage.query.filter(OutboxMessage.id.in_(claimed)).all()
+
+    def _build(self, message):
+        email = EmailMessage()
+        email['Subject'] = message.subject
+        email['From'] = message.sender or self.app.config.get('MAIL_DEFAULT_SENDER')
+        email['To'] = ', '.join(message.recipients)
+        email.set_content('This message requires an HTML capable mail client.')
+        email.add_alternative(message.html, subtype='html')
+        return email
+
+    def _deliver(self, email):
+        """Send one message; returns None or the error text."""
+        if self.app.config.get('MAIL_SUPPRESS_SEND'):
+            return None
+        connection = None
+        try:
+            connection = self.pool.acquire()
+            connection.send_message(email)
+        except Exception as e:
+            if connection is not None:
+                self.pool.discard(connection)
+            return str(e)
+        self.pool.release(connection)
+        return None
+
+    def send_batch(self):
+        """Deliver one batch of due messages. Returns how many were claimed."""
+        messages = self._claim()
+        if not messages:
+            return 0
+
+        # One result per message: a failure must never mark messages already delivered as failed
+        futures = [self._executor.submit(self._deliver, self._build(message)) for message in messages]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(str(e))
+
+        now = datetime.utcnow()
+        for message, error in zip(messages, results):
+            message.attempts += 1
+            message.claimed_at = None
+            if error is None:
+                message.status = OutboxMessage.SENT
+                message.sent_at = now
+                message.last_error = None
+            elif message.attempts >= self.max_attempts:
+                message.status = OutboxMessage.FAILED
+                message.last_error = error
+                logger.error(f"Giving up on mail {message.id} after {message.attempts} attempts: {error}")
+            else:
+                # Exponential backoff: base, 2 * base, 4 * base ... capped
+                delay = min(self.retry_base * 2 ** (message.attempts - 1), self.retry_max)
+                message.status = OutboxMessage.PENDING
+                message.next_attempt_at = now + timedelta(seconds=delay)
+                message.last_error = error
+                logger.warning(f"Mail {message.id} failed, retrying in {delay}s: {error}")
+        db.session.commit()
+        return len(messages)
+
+    def drain(self):
+        """Send batches until nothing is due."""
+        with self.app.app_context():
+            while self.send_batch():
+                pass
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+
+class MailWorker(threading.Thread):
+    """Background thread that keeps draining the outbox."""
+
+    def __init__(self, app):
+        super().__init__(name='mail-worker', daemon=True)
+        self.sender = MailSender(app)
+        self.poll_interval = app.config['MAIL_WORKER_POLL_INTERVAL']
+        self._wake = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def run(self):
+        while True:
+            try:
+                self.sender.drain()
+            except Exception as e:
+                logger.error(f"Mail worker error: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def wake(app):
+    """Start (on first use) or nudge this process's background sender."""
+    global _worker
+    if not app.config['MAIL_WORKER_IN_PROCESS']:
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = MailWorker(app)
+            _worker.start()
+    _worker.wake()
+
+
+def init_app(app):
+    @app.cli.command('mail-worker')
+    @click.option('--once', is_flag=True, help='Send everything that is due, then exit.')
+    def mail_worker(once):
+        """Deliver queued mail from the outbox."""
+        if once:
+            sender = MailSender(app)
+            sender.drain()
+            sender.close()
+            return
+        worker = MailWorker(app)
+        worker.run()
@@ -0,0 +1,158 @@
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, jsonify, request
+from sqlalchemy import event
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # optional; without it nothing is recorded and /metrics is not served
+    prometheus_client = None
+
+# Requests without a matching route share one label, so bad URLs cannot grow the series count
+UNMATCHED = 'unmatched'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+SIZE_BUCKETS = tuple(256 * 4 ** power for power in range(8))  # 256 B .. 4 MB
+
+metrics = {}
+
+
+def _create_metrics():
+    """Create the collectors once per process.
+
+    Under gunicorn, gunicorn_config.py sets PROMETHEUS_MULTIPROC_DIR before
+    the workers import the app, so each worker writes its samples to files
+    there and /metrics sums them across workers.
+    """
+    if metrics or prometheus_client is None:
+        return
+    Histogram, Counter = prometheus_client.Histogram, prometheus_client.Counter
+    metrics.update(
+        requests=Counter('http_requests_total', 'Requests served',
+                         ['endpoint', 'method', 'status']),
+        latency=Histogram('http_request_duration_seconds', 'Time from routing to the final response',
+                          ['endpoint', 'method'], buckets=LATENCY_BUCKETS),
+        statements=Histogram('http_request_db_statements', 'SQL statements executed per request',
+                             ['endpoint'], buckets=STATEMENT_BUCKETS),
+        sql_time=Histogram('http_request_db_seconds', 'Time spent in SQL statements per request',
+                           ['endpoint'], buckets=LATENCY_BUCKETS),
+        serialization=Histogram('http_response_serialization_seconds', 'Time spent encoding JSON per request',
+                                ['endpoint'], buckets=LATENCY_BUCKETS),
+        size=Histogram('http_response_size_bytes', 'Response body size as sent, after compression',
+                       ['endpoint'], buckets=SIZE_BUCKETS)
+    )
+
+
+class RequestStats:
+    """Per-request accumulators, kept on ``g``."""
+
+    __slots__ = ('started', 'statements', 'sql_seconds', 'serialization_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.serialization_seconds = 0.0
+
+
+def current_stats():
+    """This request's stats, or None outside an instrumented request."""
+    return g.get('request_stats') if has_app_context() else None
+
+
+@contextmanager
+def serializing():
+    """Count the time spent in the block as JSON encoding for this request."""
+    stats = current_stats()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialization_seconds += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is None:
+        return
+    stats = current_stats()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += time.perf_counter() - started
+
+
+def attach_engine(engine):
+    """Time every statement on ``engine`` (an executemany counts once)."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _endpoint():
+    rule = request.url_rule
+    return rule.endpoint if rule is not None else UNMATCHED
+
+
+def render():
+    """Prometheus text exposition of every worker's metrics (or just this process's)."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry)
+
+
+def init_app(app, db):
+    """Instrument requests and SQL on every engine, and serve /metrics.
+
+    Call before the other init_app hooks: Flask runs after_request hooks in
+    reverse order, so the size recorded here is the final, compressed body.
+    """
+    if not app.config['METRICS_ENABLED'] or prometheus_client is None:
+        return
+    _create_metrics()
+    with app.app_context():
+        for engine in db.engines.values():
+            attach_engine(engine)
+
+    @app.before_request
+    def start_request_stats():
+        if request.endpoint != 'metrics':
+            g.request_stats = RequestStats()
+
+    @app.after_request
+    def record_request_stats(response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+        endpoint = _endpoint()
+        metrics['latency'].labels(endpoint, request.method).observe(time.perf_counter() - stats.started)
+        metrics['requests'].labels(endpoint, request.method, str(response.status_code)).inc()
+        metrics['statements'].labels(endpoint).observe(stats.statements)
+        metrics['sql_time'].labels(endpoint).observe(stats.sql_seconds)
+        metrics['serialization'].labels(endpoint).observe(stats.serialization_seconds)
+        # Streamed bodies (the export) have no size up front
+        size = response.calculate_content_length()
+        if size is not None:
+            metrics['size'].labels(endpoint).observe(size)
+        return response
+
+    @app.route('/metrics', endpoint='metrics')
+    def serve_metrics():
+        token = current_app.config['METRICS_TOKEN']
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return render(), 200, {'Content-Type': prometheus_client.CONTENT_TYPE_LATEST}
@@ -1,3 +1,8 @@
 from .user import User
+from .user_tag import UserTag
+from .user_day import UserDay
+from .tag_facet import TagFacet
+from .outbox_message import OutboxMessage
+from .data_version import DataVersion
 
-__all__ = ['User'] 
\ No newline at end of file
+__all__ = ['User', 'UserTag', 'UserDay', 'TagFacet', 'OutboxMessage', 'DataVersion']
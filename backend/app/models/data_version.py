@@ -0,0 +1,11 @@
+from app import db
+from datetime import datetime
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+
+    # What changed: 'users' (profiles, tags, days) or 'tags' (the tag list)
+    name = db.Column(db.String(32), primary_key=True)
+    # Bumped in the same transaction as every write, see app.versions
+    version = db.Column(db.Integer, nullable=False, default=0)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
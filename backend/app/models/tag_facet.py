@@ -0,0 +1,14 @@
+from app import db
+
+class TagFacet(db.Model):
+    __tablename__ = 'tag_facet'
+
+    tag = db.Column(db.String(120), primary_key=True)
+    # Number of users carrying the tag, kept in step by app.facets
+    user_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'tag': self.tag,
+            'count': self.user_count
+        }
@@ -1,4 +1,6 @@
 from app import db
+from .user_tag import UserTag
+from .user_day import UserDay, DAYS, DAY_BITS, days_to_bits
 import jwt
 import os
 from datetime import datetime, timedelta
@@ -12,11 +14,95 @@ class User(db.Model):
     description = db.Column(db.Text, nullable=True)
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
-    tags = db.Column(db.JSON, default=list)
     links = db.Column(db.JSON, default=dict)
     team = db.Column(db.String(120), nullable=True)
-    available_days = db.Column(db.JSON, default=list)
     avatar_url = db.Column(db.String(500), nullable=True)
+    # Bumped by every write to the user; PATCH checks it against If-Match
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # Tags and availability live in indexed junction tables (see user_tag.py, user_day.py)
+    tag_rows = db.relationship(
+        'UserTag', order_by='UserTag.position', cascade='all, delete-orphan', lazy='selectin'
+    )
+    day_rows = db.relationship(
+        'UserDay', order_by='UserDay.day_bitmask', cascade='all, delete-orphan', lazy='selectin'
+    )
+
+    # API (camelCase) field name -> column attribute, in to_dict() order
+    API_FIELDS = {
+        'id': 'id',
+        'email': 'email',
+        'name': 'name',
+        'description': 'description',
+        'isActive': 'is_active',
+        'isAdmin': 'is_admin',
+        'tags': 'tags',
+        'links': 'links',
+        'team': 'team',
+        'availableDays': 'available_days',
+        'avatarUrl': 'avatar_url',
+        'version': 'version'
+    }
+
+    # Fields that to_dict() never returns as None
+    API_DEFAULTS = {
+        'tags': list,
+        'links': dict,
+        'availableDays': list
+    }
+
+    # API fields loaded from junction tables rather than user columns
+    API_COLLECTIONS = ('tags', 'availableDays')
+
+    @property
+    def tags(self):
+        return [row.tag for row in self.tag_rows]
+
+    @tags.setter
+    def tags(self, tags):
+        existing = {row.tag: row for row in self.tag_rows}
+        rows = []
+        for position, tag in enumerate(UserTag.normalize(tags)):
+            row = existing.get(tag) or UserTag(tag=tag)
+            row.position = position
+            rows.append(row)
+        self.tag_rows = rows
+
+    @property
+    def available_days(self):
+        return [row.day for row in self.day_rows]
+
+    @available_days.setter
+    def available_days(self, days):
+        existing = {row.day_bitmask: row for row in self.day_rows}
+        self.day_rows = [existing.get(bit) or UserDay(day_bitmask=bit) for bit in days_to_bits(days)]
+
+    @classmethod
+    def filter_by_tags(cls, query, tags):
+        """Restrict ``query`` to users having every tag in ``tags``."""
+        for tag in UserTag.normalize(tags):
+            query = query.where(
+                db.select(UserTag.user_id)
+                .where(UserTag.tag == tag, UserTag.user_id == cls.id)
+                .exists()
+            )
+        return query
+
+    @classmethod
+    def filter_by_days(cls, query, mask, match='all'):
+        """Restrict ``query`` to users available on all (or any) days in ``mask``.
+
+        Each day is an ``id IN (...)`` over the (day_bitmask, user_id) index,
+        so the database reads only the matching user_day rows.
+        """
+        bits = [bit for bit in DAY_BITS.values() if mask & bit]
+        if not bits:
+            return query
+        if match == 'any':
+            return query.where(cls.id.in_(db.select(UserDay.user_id).where(UserDay.day_bitmask.in_(bits))))
+        for bit in bits:
+            query = query.where(cls.id.in_(db.select(UserDay.user_id).where(UserDay.day_bitmask == bit)))
+        return query
 
     def generate_login_token(self):
         """Generate a login token for email authentication."""
@@ -78,5 +164,67 @@ class User(db.Model):
             'links': self.links or {},
             'team': self.team,
             'availableDays': self.available_days or [],
-            'avatarUrl': self.avatar_url
-        } 
\ No newline at end of file
+            'avatarUrl': self.avatar_url,
+            'version': self.version
+        }
+
+    @classmethod
+    def api_columns(cls, fields=None):
+        """Return labelled user columns for the requested API fields.
+
+        ``id`` is always selected because it is the pagination key. Fields in
+        API_COLLECTIONS have no column; rows_to_dicts() loads them separately.
+        """
+        if not fields:
+            fields = list(cls.API_FIELDS)
+        unknown = [field for field in fields if field not in cls.API_FIELDS]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+        if 'id' not in fields:
+            fields = ['id'] + list(fields)
+        return [
+            getattr(cls, cls.API_FIELDS[field]).label(field)
+            for field in fields if field not in cls.API_COLLECTIONS
+        ]
+
+    @classmethod
+    def rows_to_dicts(cls, rows, fields=None):
+        """Convert rows selected with api_columns() into the to_dict() shape.
+
+        Tags and available days for the whole page are fetched with one query each.
+        """
+        fields = fields or list(cls.API_FIELDS)
+        results = [dict(row._mapping) for row in rows]
+        by_id = {result['id']: result for result in results}
+
+        if 'tags' in fields:
+            for result in results:
+                result['tags'] = []
+            if by_id:
+                tag_rows = db.session.execute(
+                    db.select(UserTag.user_id, UserTag.tag)
+                    .where(UserTag.user_id.in_(by_id))
+                    .order_by(UserTag.user_id, UserTag.position)
+                )
+                for user_id, tag in tag_rows:
+                    by_id[user_id]['tags'].append(tag)
+
+        if 'availableDays' in fields:
+            for result in results:
+                result['availableDays'] = []
+            if by_id:
+                day_rows = db.session.execute(
+                    db.select(UserDay.user_id, UserDay.day_bitmask)
+                    .where(UserDay.user_id.in_(by_id))
+                    .order_by(UserDay.user_id, UserDay.day_bitmask)
+                )
+                for user_id, bit in day_rows:
+                    by_id[user_id]['availableDays'].append(DAYS[bit.bit_length() - 1])
+
+        for result in results:
+            for field, default in cls.API_DEFAULTS.items():
+                if field in result and not result[field]:
+                    result[field] = default()
+        # Keep the to_dict() key order
+        order = ['id'] + [field for field in cls.API_FIELDS if field in fields and field != 'id']
+        return [{field: result[field] for field in order} for result in results]
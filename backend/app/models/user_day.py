@@ -0,0 +1,56 @@
+from app import db
+
+# Day name -> bit in an availability mask (Monday is the lowest bit)
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+DAY_BITS = {day: 1 << index for index, day in enumerate(DAYS)}
+
+# Spellings found in existing data and scripts, e.g. 'Mo' from create_admin.py
+DAY_ALIASES = {day[:length]: day for day in DAYS for length in (2, 3)}
+DAY_ALIASES.update({'tues': 'tuesday', 'weds': 'wednesday', 'thur': 'thursday', 'thurs': 'thursday'})
+
+def normalize_day(value):
+    """Return the canonical day name for ``value`` or None if it is not a day."""
+    value = str(value).strip().lower()
+    if value in DAY_BITS:
+        return value
+    return DAY_ALIASES.get(value)
+
+def days_to_bits(days):
+    """Convert day names in any supported spelling into sorted, unique day bits."""
+    bits = {DAY_BITS[day] for day in map(normalize_day, days or []) if day}
+    return sorted(bits)
+
+def parse_day_mask(value):
+    """Parse a comma-separated day list such as ``'sat,fri'`` into a 7-bit mask.
+
+    Raises ValueError for anything that is not a recognised day.
+    """
+    mask = 0
+    for part in str(value or '').split(','):
+        if not part.strip():
+            continue
+        day = normalize_day(part)
+        if not day:
+            raise ValueError(f'Unknown day: {part.strip()}')
+        mask |= DAY_BITS[day]
+    return mask
+
+def mask_to_days(mask):
+    """Return the day names set in an availability mask, Monday first."""
+    return [day for day in DAYS if mask & DAY_BITS[day]]
+
+class UserDay(db.Model):
+    __tablename__ = 'user_day'
+    __table_args__ = (
+        # Covering index for per-day lookups and headcounts; the primary key
+        # (user_id, day_bitmask) covers the per-user mask lookups
+        db.Index('ix_user_day_day_bitmask_user_id', 'day_bitmask', 'user_id'),
+    )
+
+    user_id = db.Column(db.String(36), db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    # Single bit from DAY_BITS; a user's full availability mask is the sum of their rows
+    day_bitmask = db.Column(db.Integer, primary_key=True)
+
+    @property
+    def day(self):
+        return DAYS[self.day_bitmask.bit_length() - 1]
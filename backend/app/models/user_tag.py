@@ -0,0 +1,22 @@
+from app import db
+
+class UserTag(db.Model):
+    __tablename__ = 'user_tag'
+    __table_args__ = (
+        # Serves "who has tag X" lookups without touching the user table
+        db.Index('ix_user_tag_tag_user_id', 'tag', 'user_id'),
+    )
+
+    user_id = db.Column(db.String(36), db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    tag = db.Column(db.String(120), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def normalize(tags):
+        """Strip, drop empty and de-duplicate tags while keeping their order."""
+        normalized = []
+        for tag in tags or []:
+            tag = str(tag).strip()
+            if tag and tag not in normalized:
+                normalized.append(tag)
+        return normalized
@@ -0,0 +1,35 @@
+import base64
+import binascii
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(last_id):
+    """Encode the last key of a page into an opaque cursor string."""
+    return base64.urlsafe_b64encode(last_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into the last key."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        # validate=True rejects characters outside the alphabet instead of skipping them
+        last_id = base64.b64decode(padded.encode('ascii'), altchars=b'-_', validate=True).decode('utf-8')
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(f'Invalid cursor: {cursor}')
+    # Only cursors encode_cursor() can produce; this also rejects '+' and '/'
+    if not last_id or encode_cursor(last_id) != cursor:
+        raise InvalidCursor(f'Invalid cursor: {cursor}')
+    return last_id
+
+
+def parse_limit(raw_limit, default, maximum):
+    """Parse a ``limit`` query argument, clamping it to the server maximum."""
+    if raw_limit is None or raw_limit == '':
+        return min(default, maximum)
+    limit = int(raw_limit)
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, maximum)
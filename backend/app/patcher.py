@@ -0,0 +1,195 @@
+from app import compression, db, dialects, search, facets, versions
+from app.models import DataVersion, User, UserTag, UserDay
+from app.models.user_day import DAYS, days_to_bits
+
+# PATCH body field (camelCase) -> user column
+PATCH_COLUMNS = {
+    'name': 'name',
+    'description': 'description',
+    'team': 'team',
+    'links': 'links',
+    'avatarUrl': 'avatar_url',
+    'isActive': 'is_active'
+}
+PATCH_COLLECTIONS = ('tags', 'availableDays')
+
+# Fields the search index is built from
+SEARCH_FIELDS = ('name', 'description', 'tags')
+
+
+class PatchError(Exception):
+    """Raised when a patch cannot be applied."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def parse_if_match(if_match):
+    """The versions an If-Match header allows, as ``(user versions, users data versions)``.
+
+    Takes the user's ``version`` (``"4"``, as sent by PATCH) and the ETag
+    of ``GET /api/users/<id>`` (``"users-42"``), with or without an encoding
+    suffix. Returns None for ``*``.
+    """
+    if if_match.star_tag:
+        return None
+    row_versions, data_versions = [], []
+    for tag in if_match.as_set():
+        tag = compression.identity_etag(tag)
+        if tag.isdigit():
+            row_versions.append(int(tag))
+            continue
+        name, version = versions.parse_etag(tag) or (None, None)
+        if name != versions.USERS:
+            raise PatchError(f'If-Match must hold the user version or the user ETag, not "{tag}"')
+        data_versions.append(version)
+    return row_versions, data_versions
+
+
+def parse_patch(data):
+    """Validate a PATCH body and return it with tag operations normalized.
+
+    ``tags`` is either a list, which replaces the tags, or
+    ``{"add": [...], "remove": [...]}``, which edits them in place.
+    """
+    if not isinstance(data, dict) or not data:
+        raise PatchError('No fields to update')
+    unknown = [field for field in data if field not in PATCH_COLUMNS and field not in PATCH_COLLECTIONS]
+    if unknown:
+        raise PatchError(f'Unknown fields: {", ".join(unknown)}')
+    if 'name' in data and not (isinstance(data['name'], str) and data['name'].strip()):
+        raise PatchError('name must be a non-empty string')
+    if 'links' in data and not isinstance(data['links'], dict):
+        raise PatchError('links must be an object')
+    if 'isActive' in data and not isinstance(data['isActive'], bool):
+        raise PatchError('isActive must be true or false')
+    if 'availableDays' in data and not isinstance(data['availableDays'], list):
+        raise PatchError('availableDays must be a list')
+
+    patch = dict(data)
+    if 'tags' in patch:
+        tags = patch['tags']
+        if isinstance(tags, list):
+            patch['tags'] = {'replace': UserTag.normalize(tags)}
+        elif isinstance(tags, dict) and tags and set(tags) <= {'add', 'remove'} and all(
+                isinstance(value, list) for value in tags.values()):
+            patch['tags'] = {op: UserTag.normalize(value) for op, value in tags.items()}
+        else:
+            raise PatchError('tags must be a list or {"add": [...], "remove": [...]}')
+    return patch
+
+
+def _replace_tags(user_id, tags):
+    old_tags = list(db.session.execute(
+        db.delete(UserTag).where(UserTag.user_id == user_id).returning(UserTag.tag)
+    ).scalars())
+    if tags:
+        db.session.execute(db.insert(UserTag), [
+            {'user_id': user_id, 'tag': tag, 'position': position} for position, tag in enumerate(tags)
+        ])
+    facets.adjust_tag_counts(added=[tags], removed=[old_tags])
+    return set(tags) != set(old_tags)
+
+
+def _edit_tags(user_id, add=(), remove=()):
+    """Remove, then append, single tags without rewriting the rest of the list."""
+    removed = []
+    if remove:
+        removed = list(db.session.execute(
+            db.delete(UserTag)
+            .where(UserTag.user_id == user_id, UserTag.tag.in_(remove))
+            .returning(UserTag.tag)
+        ).scalars())
+    added = []
+    if add:
+        start = db.session.execute(
+            db.select(db.func.coalesce(db.func.max(UserTag.position), -1) + 1)
+            .where(UserTag.user_id == user_id)
+        ).scalar()
+        insert = dialects.insert(UserTag.__table__)
+        added = list(db.session.execute(
+            insert.on_conflict_do_nothing(index_elements=['user_id', 'tag']).returning(insert.table.c.tag),
+            [{'user_id': user_id, 'tag': tag, 'position': start + offset} for offset, tag in enumerate(add)]
+        ).scalars())
+    facets.adjust_tag_counts(added=[added], removed=[removed])
+    return bool(added or removed)
+
+
+def _current_tags(user_id):
+    return list(db.session.execute(
+        db.select(UserTag.tag).where(UserTag.user_id == user_id).order_by(UserTag.position)
+    ).scalars())
+
+
+def apply_patch(user_id, expected, patch):
+    """Apply a parsed patch with targeted statements; nothing is committed.
+
+    The user row is updated first, guarded by the versions parse_if_match()
+    returned (None skips the check, for ``If-Match: *``), which also bumps
+    the version. Only the fields present in the patch are written. Returns
+    the changed fields in API form plus ``id`` and the new ``version``, and
+    the data version names that changed.
+
+    A users data version (the ETag of ``GET /api/users/<id>``) only
+    matches while no user at all has changed since, so an If-Match taken
+    from that ETag gets 412 after any write to any user. Clients should
+    retry with the user's own ``version``, which only this user's writes
+    move.
+    """
+    values = {PATCH_COLUMNS[field]: value for field, value in patch.items() if field in PATCH_COLUMNS}
+    if 'name' in values:
+        values['name'] = values['name'].strip()
+    statement = db.update(User).where(User.id == user_id)
+    if expected is not None:
+        row_versions, data_versions = expected
+        condition = User.version.in_(row_versions)
+        if data_versions:
+            # Locked, so a concurrent patch that bumps it is seen once it commits
+            data_version = (db.select(DataVersion.version).where(DataVersion.name == versions.USERS)
+                            .with_for_update().scalar_subquery())
+            condition = db.or_(condition, data_version.in_(data_versions))
+        statement = statement.where(condition)
+    row = db.session.execute(
+        statement.values(version=User.version + 1, **values)
+        .returning(User.version, User.name, User.description)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        current = db.session.execute(db.select(User.version).where(User.id == user_id)).scalar()
+        if current is None:
+            raise PatchError('User not found', 404)
+        raise PatchError(f'Version mismatch: current version is {current}', 412)
+
+    result = {'id': user_id, 'version': row.version}
+    result.update({field: values[column] for field, column in PATCH_COLUMNS.items() if column in values})
+    changed = [versions.USERS]
+
+    if 'tags' in patch:
+        tags = patch['tags']
+        if 'replace' in tags:
+            tags_changed = _replace_tags(user_id, tags['replace'])
+        else:
+            tags_changed = _edit_tags(user_id, tags.get('add'), tags.get('remove'))
+        if tags_changed:
+            changed.append(versions.TAGS)
+        result['tags'] = _current_tags(user_id)
+
+    if 'availableDays' in patch:
+        bits = days_to_bits(patch['availableDays'])
+        db.session.execute(db.delete(UserDay).where(UserDay.user_id == user_id))
+        if bits:
+            db.session.execute(db.insert(UserDay), [{'user_id': user_id, 'day_bitmask': bit} for bit in bits])
+        result['availableDays'] = [DAYS[bit.bit_length() - 1] for bit in bits]
+
+    if any(field in patch for field in SEARCH_FIELDS):
+        search.index_documents([search.document_for({
+            'id': user_id,
+            'name': row.name,
+            'description': row.description,
+            'tags': result['tags'] if 'tags' in result else _current_tags(user_id)
+        })])
+
+    versions.bump(*changed)
+    return result, changed
@@ -0,0 +1,15 @@
+"""Query-budget fixtures; enable with ``pytest_plugins = ['app.pytest_plugin']`` in conftest.py."""
+import pytest
+from app import querybudget
+
+
+@pytest.fixture
+def query_counter():
+    """count_queries(): ``with query_counter() as log: ...`` then check ``log.count``."""
+    return querybudget.count_queries
+
+
+@pytest.fixture
+def max_queries():
+    """max_queries(n): fails the test if the block issues more than ``n`` statements."""
+    return querybudget.max_queries
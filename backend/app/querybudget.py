@@ -0,0 +1,178 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask import Response, current_app, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Logs that statements in the current thread/greenlet are recorded into
+_active = ContextVar('query_logs', default=())
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM = re.compile(r'%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_VALUES = re.compile(r'(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(statement):
+    """The shape of a SQL statement: literals and parameters become ``?``,
+    IN lists and multi-row VALUES collapse, whitespace is squeezed.
+
+    The same query issued once per item normalizes to the same shape,
+    which is what an N+1 looks like in a report.
+    """
+    shape = _STRING.sub('?', statement)
+    shape = _PARAM.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    shape = _LIST.sub('(...)', shape)
+    shape = _VALUES.sub(r'\1', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block or request issues more statements than its budget."""
+
+
+class QueryLog:
+    """Statements executed while a count_queries() block was active."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def shapes(self):
+        """``(count, shape)`` per normalized statement, most frequent first."""
+        return [(count, shape) for shape, count in Counter(map(normalize, self.statements)).most_common()]
+
+    def report(self, limit=10):
+        lines = [f'{self.count} statements']
+        shapes = self.shapes()
+        for count, shape in shapes[:limit]:
+            lines.append(f'  {count:>4} x {shape}')
+        if len(shapes) > limit:
+            lines.append(f'  ... and {len(shapes) - limit} more shapes')
+        return '\n'.join(lines)
+
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    for log in _active.get():
+        log.statements.append(statement)
+
+
+def attach_engine(engine):
+    """Record statements on ``engine`` into the active logs (an executemany counts once)."""
+    if not event.contains(engine, 'before_cursor_execute', _record):
+        event.listen(engine, 'before_cursor_execute', _record)
+
+
+@contextmanager
+def count_queries():
+    """Collect the statements this thread (or greenlet) executes inside the block.
+
+        with count_queries() as log:
+            client.get('/api/users')
+        assert log.count <= 3, log.report()
+
+    Blocks may nest; each sees every statement run inside it.
+    """
+    log = QueryLog()
+    token = _active.set(_active.get() + (log,))
+    try:
+        yield log
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def max_queries(budget, label='block'):
+    """Like count_queries(), but raise QueryBudgetExceeded if the block runs over ``budget``."""
+    with count_queries() as log:
+        yield log
+    if log.count > budget:
+        raise QueryBudgetExceeded(f'{label} exceeded its query budget of {budget}: {log.report()}')
+
+
+def _counted(iterable, log, check):
+    """Yield from a streamed body with ``log`` recording, then run ``check`` once it is done."""
+    iterator = iter(iterable)
+    try:
+        while True:
+            token = _active.set(_active.get() + (log,))
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                _active.reset(token)
+            yield chunk
+    finally:
+        if hasattr(iterator, 'close'):
+            iterator.close()
+    check()
+
+
+def query_budget(budget, per_chunk=0, chunks=None):
+    """Declare the most statements a view may issue, on a cache miss with a cold auth cache.
+
+    Put it directly under ``@api.route`` so it covers the other decorators
+    too. Views that work in chunks pass ``chunks``, a function returning
+    how many chunks the request took, called once the response is done:
+    ``budget`` covers the first and each further one adds ``per_chunk``.
+    Streamed responses are counted until the body has been written.
+
+    QUERY_BUDGET_MODE decides what happens when a request runs over:
+    ``raise`` fails the request with QueryBudgetExceeded (the testing
+    config), ``log`` logs a warning with the statements grouped by shape,
+    and ``off`` does not count at all.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            mode = current_app.config['QUERY_BUDGET_MODE']
+            if mode == 'off':
+                return view(*args, **kwargs)
+            label = f'{request.method} {request.path}'
+
+            def check():
+                limit = budget + per_chunk * max((chunks() if chunks else 1) - 1, 0)
+                if log.count > limit:
+                    message = f'{label} exceeded its query budget of {limit}: {log.report()}'
+                    if mode == 'raise':
+                        raise QueryBudgetExceeded(message)
+                    logger.warning(message)
+
+            with count_queries() as log:
+                response = view(*args, **kwargs)
+            if isinstance(response, Response) and response.is_streamed:
+                response.response = _counted(response.response, log, check)
+            else:
+                check()
+            return response
+        wrapper.query_budget = budget
+        return wrapper
+    return decorator
+
+
+def budgets(app):
+    """Declared budget per endpoint name, for tests that walk every route."""
+    return {
+        endpoint: view.query_budget
+        for endpoint, view in app.view_functions.items()
+        if hasattr(view, 'query_budget')
+    }
+
+
+def init_app(app, db):
+    with app.app_context():
+        for engine in db.engines.values():
+            attach_engine(engine)
+
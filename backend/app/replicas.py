@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+from functools import wraps
+from flask import g, request
+from flask_sqlalchemy.session import Session
+from app.auth import bearer_token, token_key
+
+# Bind keys of the read replicas in SQLALCHEMY_BINDS
+REPLICA_BIND_PREFIX = 'replica_'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class StickyPrimary:
+    """Remembers which callers wrote recently so their reads skip the replicas.
+
+    Keyed by a hash of the caller's bearer token. Per process, so it covers
+    follow-up requests handled by the same worker; other workers fall back
+    to the replica after their own writes only.
+    """
+
+    def __init__(self, seconds=5):
+        self.seconds = seconds
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) > 10000:
+                self._until = {k: until for k, until in self._until.items() if until > now}
+            self._until[key] = now + self.seconds
+
+    def active(self, key):
+        until = self._until.get(key)
+        return until is not None and until > time.monotonic()
+
+
+sticky = StickyPrimary()
+
+
+def _is_read(clause):
+    if clause is None:
+        return False
+    if getattr(clause, 'is_select', False):
+        return getattr(clause, '_for_update_arg', None) is None
+    if getattr(clause, 'is_text', False):
+        return clause.text.lstrip().upper().startswith('SELECT')
+    return False
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica once ``use_replica`` is set.
+
+    Writes, flushes and anything that is not a plain SELECT go to the
+    primary. After the first write every later statement in the session
+    goes to the primary too, so a request always reads its own writes.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.use_replica = False
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _is_read(clause):
+            if self.use_replica and not self.wrote:
+                replica = replica_engine(self._db)
+                if replica is not None:
+                    return replica
+        elif self._flushing or getattr(clause, 'is_dml', False) or getattr(clause, 'is_text', False):
+            self.wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_engine(db):
+    """A random replica engine, or None when no replicas are configured."""
+    replicas = [engine for key, engine in db.engines.items() if key and key.startswith(REPLICA_BIND_PREFIX)]
+    return random.choice(replicas) if replicas else None
+
+
+def pinned_to_primary(db):
+    """True when replicas exist but this request reads from the primary (it wrote, or is sticky)."""
+    session = db.session()
+    return replica_engine(db) is not None and (not session.use_replica or session.wrote)
+
+
+def replica_binds(config):
+    """SQLALCHEMY_BINDS entries for the configured replica URLs."""
+    return {f'{REPLICA_BIND_PREFIX}{index}': url for index, url in enumerate(config['SQLALCHEMY_REPLICA_URLS'])}
+
+
+def _caller_key():
+    token = bearer_token(request.headers.get('Authorization'))
+    return token_key(token) if token else None
+
+
+def use_primary(view):
+    """Read from the primary even on a GET, for views that must see the latest writes."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from app import db
+        db.session().use_replica = False
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_app(app, db):
+    sticky.seconds = app.config['DB_REPLICA_STICKY_SECONDS']
+    if not app.config['SQLALCHEMY_REPLICA_URLS']:
+        return
+
+    @app.before_request
+    def route_reads_to_replica():
+        if request.method not in READ_METHODS:
+            return
+        g.replica_caller = _caller_key()
+        if g.replica_caller is None or not sticky.active(g.replica_caller):
+            db.session().use_replica = True
+
+    @app.after_request
+    def remember_writer(response):
+        session = db.session()
+        if session.wrote:
+            key = g.get('replica_caller') or _caller_key()
+            if key:
+                sticky.mark(key)
+        return response
@@ -1,18 +1,23 @@
-from flask import Blueprint, jsonify, request, url_for
-from app.models import User
-from app import db, mail
-from flask_mail import Message
+from flask import Blueprint, Response, abort, g, jsonify, request, url_for, current_app, stream_with_context
+from app.models import User, UserDay, TagFacet
+from app.models.user_day import DAY_BITS, parse_day_mask
+from app import db, search, facets, importer, exporter, deleter, patcher, auth, mailqueue, google_tokens, engine, versions, serialization, compression
+from app.auth import login_required
+from app.replicas import use_primary
+from app.querybudget import query_budget
+from app.cache import cached, response_cache
+from app.slowlog import slow_queries
+from app.pagination import InvalidCursor, encode_cursor, decode_cursor, parse_limit
 import uuid
 import jwt
 import os
-from datetime import datetime, timedelta
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from datetime import datetime, timedelta, timezone
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
 # Add root route
 @api.route('/')
+@query_budget(0)
 def index():
     return jsonify({
         'status': 'ok',
@@ -24,9 +29,14 @@ def index():
             },
             'users': {
                 'list': '/api/users [GET]',
+                'search': '/api/users/search?q=<query> [GET]',
+                'available': '/api/availability?all=<days>&any=<days> [GET]',
+                'availabilitySummary': '/api/availability/summary [GET]',
                 'get': '/api/users/<user_id> [GET]',
                 'update': '/api/users/<user_id> [PUT]',
-                'import': '/api/users/import [POST]'
+                'patch': '/api/users/<user_id> [PATCH]',
+                'import': '/api/users/import [POST]',
+                'export': '/api/users/export?format=csv|ndjson [GET]'
             }
         }
     })
@@ -39,6 +49,7 @@ def generate_token(user_id):
     return jwt.encode(payload, os.getenv('SECRET_KEY', 'default-secret-key'), algorithm='HS256')
 
 @api.route('/auth/login', methods=['POST'])
+@query_budget(4)
 def login():
     email = request.json.get('email')
     if not email:
@@ -47,6 +58,8 @@ def login():
     user = User.query.filter_by(email=email).first()
     if not user:
         return jsonify({'error': 'User not found. Please contact your administrator.'}), 404
+    if not user.is_active:
+        return jsonify({'error': 'Account is deactivated'}), 403
     
     # Generate login token
     token = user.generate_login_token()
@@ -63,27 +76,31 @@ def login():
             'debug_link': login_link
         }), 200
     
-    # In production, send email
+    # In production, queue the email; the background sender delivers it
     try:
-        msg = Message(
+        mailqueue.enqueue(
             'Your Community Board Login Link',
-            sender=os.getenv('MAIL_DEFAULT_SENDER'),
-            recipients=[email]
-        )
-        msg.html = f"""
+            [email],
+            f"""
         <h2>Welcome to Community Board!</h2>
         <p>Click the link below to log in:</p>
         <p><a href="{login_link}">{login_link}</a></p>
         <p>This link will expire in 24 hours.</p>
         <p>If you didn't request this login link, please ignore this email.</p>
-        """
-        mail.send(msg)
-        return jsonify({'message': 'Login link sent successfully'}), 200
+        """,
+            sender=os.getenv('MAIL_DEFAULT_SENDER')
+        )
+        db.session.commit()
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
+        db.session.rollback()
+        print(f"Error queueing email: {str(e)}")
         return jsonify({'error': 'Failed to send login email. Please try again later.'}), 500
+    mailqueue.wake(current_app._get_current_object())
+    return jsonify({'message': 'Login link sent successfully'}), 200
 
 @api.route('/auth/verify', methods=['GET'])
+@query_budget(6)
+@use_primary
 def verify_login():
     try:
         # Try to get token from query parameters first
@@ -92,33 +109,27 @@ def verify_login():
         
         # If not in query params, try Bearer token
         if not token:
-            auth_header = request.headers.get('Authorization')
-            if auth_header and auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
+            token = auth.bearer_token(request.headers.get('Authorization'))
+            if token:
                 try:
-                    # Decode the token to get the user_id
-                    payload = jwt.decode(
-                        token,
-                        os.getenv('SECRET_KEY', 'default-secret-key'),
-                        algorithms=['HS256']
-                    )
-                    user = User.query.get(payload['user_id'])
-                    if user:
-                        return jsonify({
-                            'isAdmin': user.is_admin,
-                            'user': user.to_dict()
-                        })
-                    return jsonify({'error': 'User not found'}), 404
-                except jwt.ExpiredSignatureError:
-                    return jsonify({'error': 'Token has expired'}), 401
-                except jwt.InvalidTokenError:
-                    return jsonify({'error': 'Invalid token'}), 401
+                    principal = auth.authenticate(token)
+                except auth.AuthError as e:
+                    return jsonify({'error': e.message}), e.status
+                user = User.query.get(principal.id)
+                if user:
+                    return jsonify({
+                        'isAdmin': user.is_admin,
+                        'user': user.to_dict()
+                    })
+                return jsonify({'error': 'User not found'}), 404
         
         # Handle email-based verification
         if token and email:
             user = User.query.filter_by(email=email).first()
             if not user:
                 return jsonify({'error': 'User not found'}), 404
+            if not user.is_active:
+                return jsonify({'error': 'Account is deactivated'}), 403
             
             try:
                 if user.verify_token(token):
@@ -137,34 +148,215 @@ def verify_login():
         print(f"Verification error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def _list_users(endpoint, apply_filters=None):
+    """Return one keyset-paginated page of users as a JSON response.
+
+    ``apply_filters`` receives the select statement and may add WHERE clauses;
+    a ValueError from it is reported to the client as a 400.
+    """
+    # Keyset pagination on the primary key keeps page cost independent of table size
+    try:
+        limit = parse_limit(
+            request.args.get('limit'),
+            current_app.config['USERS_PAGE_DEFAULT_LIMIT'],
+            current_app.config['USERS_PAGE_MAX_LIMIT']
+        )
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    try:
+        columns = User.api_columns(fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Full user objects can be assembled from cached per-user JSON, so only ids are selected
+    assemble = not fields and serialization.byte_assembly_enabled()
+    query = db.select(*([User.id] if assemble else columns)).order_by(User.id).limit(limit + 1)
+    if apply_filters:
+        try:
+            query = apply_filters(query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            query = query.where(User.id > decode_cursor(cursor))
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+
+    rows = db.session.execute(query).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if assemble:
+        response = serialization.users_response([row.id for row in rows])
+    else:
+        response = jsonify(User.rows_to_dicts(rows, fields))
+    if has_more:
+        next_cursor = encode_cursor(rows[-1].id)
+        next_args = request.args.to_dict()
+        next_args.update({'cursor': next_cursor, 'limit': limit})
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for(endpoint, **next_args)}>; rel="next"'
+    return response
+
 @api.route('/users', methods=['GET'])
+@query_budget(5)
+@versions.conditional(versions.USERS)
+@cached(versions.USERS)
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    def apply_filters(query):
+        # Tag and day filters run as indexed lookups on the junction tables
+        tags = [tag for tag in request.args.get('tags', '').split(',') if tag.strip()]
+        if tags:
+            query = User.filter_by_tags(query, tags)
+        return User.filter_by_days(query, parse_day_mask(request.args.get('days')))
+
+    return _list_users('api.get_users', apply_filters)
+
+@api.route('/availability', methods=['GET'])
+@query_budget(5)
+def get_available_users():
+    all_days = request.args.get('all')
+    any_days = request.args.get('any')
+    if not all_days and not any_days:
+        return jsonify({'error': 'Provide days with all= or any='}), 400
+
+    def apply_filters(query):
+        query = User.filter_by_days(query, parse_day_mask(all_days), match='all')
+        return User.filter_by_days(query, parse_day_mask(any_days), match='any')
+
+    return _list_users('api.get_available_users', apply_filters)
+
+@api.route('/availability/summary', methods=['GET'])
+@query_budget(1)
+def get_availability_summary():
+    # Per-day headcount, answered from the (day_bitmask, user_id) index alone
+    counts = dict(db.session.execute(
+        db.select(UserDay.day_bitmask, db.func.count(UserDay.user_id))
+        .group_by(UserDay.day_bitmask)
+    ).all())
+    return jsonify({day: counts.get(bit, 0) for day, bit in DAY_BITS.items()})
+
+@api.route('/users/search', methods=['GET'])
+@query_budget(5)
+def search_users():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Search query is required'}), 400
+
+    try:
+        limit = parse_limit(
+            request.args.get('limit'),
+            current_app.config['SEARCH_PAGE_DEFAULT_LIMIT'],
+            current_app.config['USERS_PAGE_MAX_LIMIT']
+        )
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    # Ranked results are paged by offset; the cursor just carries it opaquely
+    offset = 0
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            offset = int(decode_cursor(cursor))
+        except (InvalidCursor, ValueError):
+            return jsonify({'error': f'Invalid cursor: {cursor}'}), 400
+
+    user_ids = search.search_user_ids(query, limit + 1, offset)
+    has_more = len(user_ids) > limit
+    user_ids = user_ids[:limit]
+
+    if serialization.byte_assembly_enabled():
+        response = serialization.users_response(user_ids)
+    else:
+        rows = db.session.execute(db.select(*User.api_columns()).where(User.id.in_(user_ids))).all() if user_ids else []
+        users = {user['id']: user for user in User.rows_to_dicts(rows)}
+        response = jsonify([users[user_id] for user_id in user_ids if user_id in users])
+    if has_more:
+        next_cursor = encode_cursor(str(offset + limit))
+        next_args = request.args.to_dict()
+        next_args.update({'cursor': next_cursor, 'limit': limit})
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("api.search_users", **next_args)}>; rel="next"'
+    return response
+
+def _body_chunks(field, setting):
+    """Query budget chunks: how many chunks of ``setting`` rows the body's ``field`` list takes."""
+    def chunks():
+        data = request.get_json(silent=True)
+        items = data.get(field) if isinstance(data, dict) else None
+        return -(-len(items or []) // current_app.config[setting])
+    return chunks
+
+def _export_batches():
+    return g.get('export_batches', 1)
+
+@api.route('/users/export', methods=['GET'])
+@query_budget(6, per_chunk=2, chunks=_export_batches)
+@login_required
+def export_users():
+    if not g.current_user.is_admin:
+        return jsonify({'error': 'Only admins can export users'}), 403
+
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format == 'csv':
+        chunks, mimetype = exporter.csv_chunks(), 'text/csv'
+    elif export_format == 'ndjson':
+        chunks, mimetype = exporter.ndjson_chunks(), 'application/x-ndjson'
+    else:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+
+    def counted(chunks):
+        # Each batch of users costs statements, see the query budget above
+        for chunk in chunks:
+            g.export_batches = g.get('export_batches', 0) + 1
+            yield chunk
+    chunks = counted(chunks)
+
+    headers = {'Content-Disposition': f'attachment; filename=users.{export_format}'}
+    encoding = compression.negotiate()
+    if encoding == 'br':
+        chunks = exporter.brotli_chunks(chunks, compression.settings['brotli_quality'])
+    elif encoding == 'gzip':
+        chunks = exporter.gzip_chunks(chunks, compression.settings['gzip_level'])
+    if encoding:
+        headers['Content-Encoding'] = encoding
+        headers['Vary'] = 'Accept-Encoding'
+
+    # Rows are streamed from the database as the response is written
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
 
 @api.route('/users/<user_id>', methods=['GET'])
+@query_budget(4)
+@versions.conditional(versions.USERS)
+@cached(versions.USERS)
 def get_user(user_id):
-    user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    if serialization.byte_assembly_enabled():
+        encoded = serialization.encode_users([user_id])
+        if not encoded:
+            abort(404)
+        return current_app.json.bytes_response(encoded[0])
+    rows = db.session.execute(db.select(*User.api_columns()).where(User.id == user_id)).all()
+    if not rows:
+        abort(404)
+    return jsonify(User.rows_to_dicts(rows)[0])
 
 @api.route('/users/<user_id>', methods=['PUT'])
+@query_budget(18)
+@login_required
 def update_user(user_id):
-    # Get the current user from the token
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'Authorization required'}), 401
-    
+    current_user = g.current_user
     try:
-        token = auth_header.split(' ')[1]
-        payload = jwt.decode(token, os.getenv('SECRET_KEY', 'default-secret-key'), algorithms=['HS256'])
-        current_user = User.query.get(payload['user_id'])
-        
         # Only allow users to edit their own profile unless they're an admin
         if not current_user.is_admin and current_user.id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
         user = User.query.get_or_404(user_id)
         data = request.json
+        old_tags = user.tags
         
         # Update allowed fields
         allowed_fields = [
@@ -184,32 +376,57 @@ def update_user(user_id):
                 else:
                     setattr(user, field, data.get(field))
         
+        user.version = User.version + 1
+        search.index_users([user])
+        facets.adjust_tag_counts(added=[user.tags], removed=[old_tags])
+        changed = [versions.USERS] + ([versions.TAGS] if user.tags != old_tags else [])
+        versions.bump(*changed)
         db.session.commit()
+        auth.invalidate_user(user.id)
+        serialization.user_json.invalidate(user.id)
+        response_cache.invalidate(*changed)
         return jsonify(user.to_dict())
     
-    except jwt.ExpiredSignatureError:
-        return jsonify({'error': 'Token has expired'}), 401
-    except jwt.InvalidTokenError:
-        return jsonify({'error': 'Invalid token'}), 401
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@api.route('/users/<user_id>', methods=['PATCH'])
+@query_budget(15)
+@login_required
+def patch_user(user_id):
+    """Update only the given fields, guarded by the user's version in If-Match."""
+    current_user = g.current_user
+    if not current_user.is_admin and current_user.id != user_id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    if not request.if_match:
+        return jsonify({'error': 'If-Match with the user version is required'}), 428
+
+    try:
+        expected = patcher.parse_if_match(request.if_match)
+        patch = patcher.parse_patch(request.get_json(silent=True))
+        result, changed = patcher.apply_patch(user_id, expected, patch)
+        db.session.commit()
+    except patcher.PatchError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    auth.invalidate_user(user_id)
+    serialization.user_json.invalidate(user_id)
+    response_cache.invalidate(*changed)
+    response = jsonify(result)
+    response.set_etag(str(result['version']))
+    return response
+
 @api.route('/users/import', methods=['POST'])
+@query_budget(14, per_chunk=11, chunks=_body_chunks('data', 'IMPORT_CHUNK_SIZE'))
+@login_required
 def import_users():
-    # Get the current user from the token
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'Authorization required'}), 401
-    
+    current_user = g.current_user
     try:
-        token = auth_header.split(' ')[1]
-        payload = jwt.decode(token, os.getenv('SECRET_KEY', 'default-secret-key'), algorithms=['HS256'])
-        current_user = User.query.get(payload['user_id'])
-        
-        if not current_user:
-            return jsonify({'error': 'User not found'}), 404
-
         data = request.json.get('data', [])
         if not data:
             return jsonify({'error': 'No data provided'}), 400
@@ -218,96 +435,75 @@ def import_users():
         if not current_user.is_admin and len(data) > 10:
             return jsonify({'error': 'Non-admin users can only import up to 10 users at a time'}), 403
 
-        new_users = []
+        imported = []
         errors = []
-        
+        chunk_size = current_app.config['IMPORT_CHUNK_SIZE']
+
+        # Validate everything up front, then write chunk by chunk with set-based statements
+        prepared = []
         for idx, user_data in enumerate(data):
-            # Validate required fields
-            if not user_data.get('email'):
-                errors.append(f'Row {idx + 1}: Email is required')
-                continue
-            if not user_data.get('name'):
-                errors.append(f'Row {idx + 1}: Name is required')
-                continue
-                
-            # Check if email already exists
-            if User.query.filter_by(email=user_data.get('email')).first():
-                errors.append(f'Row {idx + 1}: Email {user_data.get("email")} already exists')
-                continue
-
-            # Process tags
-            tags = []
-            if user_data.get('tags'):
-                if isinstance(user_data['tags'], str):
-                    tags = [tag.strip() for tag in user_data['tags'].split(';') if tag.strip()]
-                elif isinstance(user_data['tags'], list):
-                    tags = [tag.strip() for tag in user_data['tags']]
-
-            # For non-admin users, set some default values and restrictions
-            is_admin = current_user.is_admin and user_data.get('is_admin', False)
-            
-            # Create new user
-            try:
-                user = User(
-                    id=str(uuid.uuid4()),
-                    email=user_data.get('email'),
-                    name=user_data.get('name'),
-                    description=user_data.get('description', ''),
-                    tags=tags,
-                    team=user_data.get('team', ''),
-                    links=user_data.get('links', {}),
-                    is_active=True,
-                    is_admin=is_admin
-                )
-                db.session.add(user)
-                new_users.append(user)
-            except Exception as e:
-                errors.append(f'Row {idx + 1}: Failed to create user - {str(e)}')
-                continue
-        
-        if new_users:
-            try:
-                db.session.commit()
-            except Exception as e:
-                db.session.rollback()
-                return jsonify({
-                    'error': 'Database error while importing users',
-                    'details': str(e)
-                }), 500
-
-        response = {
-            'imported': len(new_users),
-            'users': [user.to_dict() for user in new_users],
-        }
+            mapping, error = importer.prepare_row(user_data, idx + 1, allow_admin=current_user.is_admin)
+            if error:
+                errors.append((idx + 1, error))
+            else:
+                prepared.append((idx + 1, mapping))
+
+        try:
+            for start in range(0, len(prepared), chunk_size):
+                inserted, chunk_errors = importer.insert_users(prepared[start:start + chunk_size])
+                imported.extend(inserted)
+                errors.extend(chunk_errors)
+            db.session.commit()
+            if imported:
+                response_cache.invalidate(versions.USERS, versions.TAGS)
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'error': 'Database error while importing users',
+                'details': str(e)
+            }), 500
+
+        # Errors are reported in row order regardless of which pass found them
+        errors = [message for _, message in sorted(errors)]
+        response = {'imported': len(imported)}
+
+        # Echo the created users only on request; large imports would otherwise serialize everything back
+        if request.args.get('returnUsers', '').lower() in ('1', 'true') or request.json.get('returnUsers'):
+            user_ids = [mapping['id'] for mapping in imported]
+            users = {}
+            for start in range(0, len(user_ids), chunk_size):
+                for user in User.query.filter(User.id.in_(user_ids[start:start + chunk_size])):
+                    users[user.id] = user
+            response['users'] = [users[user_id].to_dict() for user_id in user_ids]
         
         if errors:
             response['errors'] = errors
-            return jsonify(response), 400 if not new_users else 207  # 207 Multi-Status
+            return jsonify(response), 400 if not imported else 207  # 207 Multi-Status
 
         return jsonify(response), 201
 
-    except jwt.ExpiredSignatureError:
-        return jsonify({'error': 'Token has expired'}), 401
-    except jwt.InvalidTokenError:
-        return jsonify({'error': 'Invalid token'}), 401
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 @api.route('/tags', methods=['GET'])
+@query_budget(2)
+@versions.conditional(versions.TAGS)
+@cached(versions.TAGS)
 def get_tags():
     try:
-        # Get all unique tags from all users
-        users = User.query.all()
-        all_tags = set()
-        for user in users:
-            if user.tags:
-                all_tags.update(user.tags)
-        return jsonify(sorted(list(all_tags)))
+        # Tag facets are maintained on write, so this never touches the user table
+        tag_facets = db.session.execute(
+            db.select(TagFacet.tag, TagFacet.user_count).order_by(TagFacet.tag)
+        ).all()
+        if request.args.get('withCounts', '').lower() in ('1', 'true'):
+            return jsonify([{'tag': tag, 'count': count} for tag, count in tag_facets])
+        return jsonify([tag for tag, _ in tag_facets])
     except Exception as e:
         print(f"Error fetching tags: {str(e)}")
         return jsonify({'error': 'Failed to fetch tags'}), 500 
 
 @api.route('/auth/google', methods=['POST'])
+@query_budget(9)
 def google_auth():
     try:
         # Get the token from the request
@@ -315,9 +511,9 @@ def google_auth():
         if not credential:
             return jsonify({'error': 'No credential provided'}), 400
 
-        # Verify the token
-        client_id = os.getenv('GOOGLE_CLIENT_ID')
-        idinfo = id_token.verify_oauth2_token(credential, requests.Request(), client_id)
+        # Verify the token against Google's cached signing keys
+        client_id = current_app.config['GOOGLE_CLIENT_ID']
+        idinfo = google_tokens.verify_id_token(credential, client_id)
 
         # Get user info from the token
         email = idinfo['email']
@@ -334,7 +530,13 @@ def google_auth():
                 is_active=True
             )
             db.session.add(user)
+            search.index_users([user])
+            facets.adjust_tag_counts(added=[user.tags])
+            versions.bump(versions.USERS)
             db.session.commit()
+            response_cache.invalidate(versions.USERS)
+        elif not user.is_active:
+            return jsonify({'error': 'Account is deactivated'}), 403
 
         # Generate JWT token
         token = generate_token(user.id)
@@ -351,24 +553,18 @@ def google_auth():
         return jsonify({'error': str(e)}), 500 
 
 @api.route('/users/delete', methods=['POST'])
+@query_budget(11, per_chunk=8, chunks=_body_chunks('userIds', 'DELETE_CHUNK_SIZE'))
+@login_required
 def delete_users():
-    # Get the current user from the token
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'Authorization required'}), 401
-    
+    current_user = g.current_user
     try:
-        token = auth_header.split(' ')[1]
-        payload = jwt.decode(token, os.getenv('SECRET_KEY', 'default-secret-key'), algorithms=['HS256'])
-        current_user = User.query.get(payload['user_id'])
-        
-        if not current_user:
-            return jsonify({'error': 'User not found'}), 404
-
         # Get user IDs to delete from request
         user_ids = request.json.get('userIds', [])
         if not user_ids:
             return jsonify({'error': 'No user IDs provided'}), 400
+        # Soft delete only deactivates the accounts, which is far cheaper for large batches.
+        # Deactivated accounts can no longer sign in or use their tokens, but stay listed.
+        soft = bool(request.json.get('soft', False))
 
         # For non-admin users, add safety checks
         if not current_user.is_admin:
@@ -376,31 +572,28 @@ def delete_users():
             if len(user_ids) > 1 or current_user.id not in user_ids:
                 return jsonify({'error': 'Unauthorized to delete other users'}), 403
 
-        deleted_count = 0
-        errors = []
-        
-        for user_id in user_ids:
-            try:
-                user = User.query.get(user_id)
-                if user:
-                    # Prevent deletion of admin users by non-admins
-                    if user.is_admin and not current_user.is_admin:
-                        errors.append(f'Cannot delete admin user: {user.email}')
-                        continue
-                    
-                    db.session.delete(user)
-                    deleted_count += 1
-                else:
-                    errors.append(f'User not found: {user_id}')
-            except Exception as e:
-                errors.append(f'Error deleting user {user_id}: {str(e)}')
+        # One lookup per chunk for validation, then one set-based write per chunk
+        chunk_size = current_app.config['DELETE_CHUNK_SIZE']
+        deletable, errors = deleter.check_deletions(user_ids, allow_admin=current_user.is_admin, chunk_size=chunk_size)
+        remove = deleter.deactivate_users if soft else deleter.delete_users
+        changed = [versions.USERS] if soft else [versions.USERS, versions.TAGS]
 
         try:
+            deleted_ids = []
+            for start in range(0, len(deletable), chunk_size):
+                deleted_ids.extend(remove(deletable[start:start + chunk_size]))
             db.session.commit()
-            return jsonify({
-                'deleted': deleted_count,
+            auth.invalidate_user(*deleted_ids)
+            serialization.user_json.invalidate(*deleted_ids)
+            if deleted_ids:
+                response_cache.invalidate(*changed)
+            response = {
+                'deleted': len(deleted_ids),
                 'errors': errors if errors else None
-            }), 200 if not errors else 207
+            }
+            if soft:
+                response['soft'] = True
+            return jsonify(response), 200 if not errors else 207
         except Exception as e:
             db.session.rollback()
             return jsonify({
@@ -408,14 +601,11 @@ def delete_users():
                 'details': str(e)
             }), 500
 
-    except jwt.ExpiredSignatureError:
-        return jsonify({'error': 'Token has expired'}), 401
-    except jwt.InvalidTokenError:
-        return jsonify({'error': 'Invalid token'}), 401
     except Exception as e:
         return jsonify({'error': str(e)}), 400 
 
 @api.route('/users/<user_id>/toggle-admin', methods=['POST'])
+@query_budget(8)
 def toggle_admin(user_id):
     # Only allow this in development environment
     if os.getenv('FLASK_ENV') != 'development':
@@ -424,11 +614,60 @@ def toggle_admin(user_id):
     try:
         user = User.query.get_or_404(user_id)
         user.is_admin = not user.is_admin
+        user.version = User.version + 1
+        versions.bump(versions.USERS)
         db.session.commit()
+        auth.invalidate_user(user.id)
+        serialization.user_json.invalidate(user.id)
+        response_cache.invalidate(versions.USERS)
         return jsonify({
             'message': f'Admin status toggled. User is {"now" if user.is_admin else "no longer"} an admin',
             'isAdmin': user.is_admin
         })
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 400 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/admin/db-pool', methods=['GET'])
+@query_budget(3)
+@login_required
+def db_pool_stats():
+    """Connection pool state per engine, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW under load."""
+    if not g.current_user.is_admin:
+        return jsonify({'error': 'Only admins can view pool stats'}), 403
+    return jsonify({
+        bind or 'default': engine.pool_stats(bound_engine)
+        for bind, bound_engine in db.engines.items()
+    })
+
+@api.route('/admin/cache', methods=['GET'])
+@query_budget(3)
+@login_required
+def cache_stats():
+    """Response cache hit/miss counts per tier for this worker."""
+    if not g.current_user.is_admin:
+        return jsonify({'error': 'Only admins can view cache stats'}), 403
+    return jsonify(response_cache.stats())
+
+@api.route('/admin/slow-queries', methods=['GET'])
+@query_budget(3)
+@login_required
+def slow_query_summary():
+    """Statement shapes that spent the most time above SLOW_QUERY_MS, from the shared slow query log."""
+    if not g.current_user.is_admin:
+        return jsonify({'error': 'Only admins can view slow queries'}), 403
+    try:
+        limit = parse_limit(request.args.get('limit'), 20, 100)
+        hours = float(request.args['hours']) if request.args.get('hours') else None
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer and hours a number'}), 400
+    since = None
+    if hours is not None:
+        since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat(timespec='milliseconds')
+    summary = slow_queries.summary(limit=limit, since=since)
+    summary.update({
+        'thresholdMs': current_app.config['SLOW_QUERY_MS'],
+        'log': slow_queries.path,
+        'droppedInThisWorker': slow_queries.dropped
+    })
+    return jsonify(summary)
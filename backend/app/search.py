@@ -0,0 +1,204 @@
+import re
+import logging
+from sqlalchemy import text
+from app import db, dialects
+
+logger = logging.getLogger(__name__)
+
+# Inverted index over user profiles (FTS5 table on SQLite, tsvector table on PostgreSQL)
+SEARCH_TABLE = 'user_search'
+# SQLite only: external content table backing the FTS5 index. Its INTEGER
+# PRIMARY KEY gives the index stable rowids that survive VACUUM.
+DOCUMENT_TABLE = 'user_search_doc'
+
+# Characters kept inside a search term; everything else separates terms
+TERM_PATTERN = re.compile(r'[\w.#+-]+', re.UNICODE)
+# Characters the PostgreSQL tsquery parser treats as operators
+TSQUERY_UNSAFE = re.compile(r'[^\w]+', re.UNICODE)
+
+SQLITE_SCHEMA = [
+    f'CREATE TABLE IF NOT EXISTS {DOCUMENT_TABLE} ('
+    'id INTEGER PRIMARY KEY, '
+    'user_id VARCHAR(36) NOT NULL UNIQUE, '
+    'name TEXT, description TEXT, tags TEXT)',
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+    'name, description, tags, '
+    f"content = '{DOCUMENT_TABLE}', content_rowid = 'id', "
+    "tokenize = 'unicode61', prefix = '2 3')",
+    f'CREATE TRIGGER IF NOT EXISTS {DOCUMENT_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN '
+    f'INSERT INTO {SEARCH_TABLE} (rowid, name, description, tags) '
+    'VALUES (new.id, new.name, new.description, new.tags); END',
+    f'CREATE TRIGGER IF NOT EXISTS {DOCUMENT_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN '
+    f'INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, name, description, tags) '
+    "VALUES ('delete', old.id, old.name, old.description, old.tags); END"
+]
+
+POSTGRES_SCHEMA = [
+    f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+    'user_id VARCHAR(36) PRIMARY KEY REFERENCES "user" (id) ON DELETE CASCADE, '
+    'document TSVECTOR NOT NULL)',
+    f'CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)'
+]
+
+
+def owns_table(name):
+    """True for tables the index creates itself with raw SQL, including the
+    shadow tables FTS5 names after the search table."""
+    return name == SEARCH_TABLE or name.startswith(f'{SEARCH_TABLE}_')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Alembic autogenerate filter: leave the search tables and their indexes alone."""
+    if type_ == 'table':
+        return not owns_table(name)
+    if type_ in ('index', 'column', 'unique_constraint', 'foreign_key_constraint'):
+        return not owns_table(object.table.name)
+    return True
+
+
+def document_for(user):
+    """Return the text indexed for a user (a User or a mapping with the same keys)."""
+    get = user.get if isinstance(user, dict) else lambda key: getattr(user, key)
+    return {
+        'user_id': get('id'),
+        'name': get('name') or '',
+        'description': get('description') or '',
+        'tags': ' '.join(get('tags') or [])
+    }
+
+
+def create_index():
+    """Create the search index tables if they do not exist yet."""
+    for statement in SQLITE_SCHEMA if dialects.is_sqlite() else POSTGRES_SCHEMA:
+        db.session.execute(text(statement))
+
+
+def index_users(users):
+    """Insert or refresh the index entries for the given users.
+
+    Runs on the current session so the index changes commit together with
+    the profile changes that caused them.
+    """
+    # New users must exist in the user table before their entries reference them
+    db.session.flush()
+    index_documents([document_for(user) for user in users])
+
+
+def index_documents(documents, replace=True):
+    """Write pre-built index documents (see document_for).
+
+    Pass ``replace=False`` for users known to have no entry yet, such as
+    freshly bulk-inserted rows, to skip the delete of old entries.
+    """
+    if not documents:
+        return
+
+    if dialects.is_sqlite():
+        if replace:
+            remove_users([document['user_id'] for document in documents])
+        db.session.execute(
+            text(
+                f'INSERT INTO {DOCUMENT_TABLE} (user_id, name, description, tags) '
+                'VALUES (:user_id, :name, :description, :tags)'
+            ),
+            documents
+        )
+        return
+
+    db.session.execute(
+        text(
+            f'INSERT INTO {SEARCH_TABLE} (user_id, document) VALUES (:user_id, '
+            "setweight(to_tsvector('simple', :name), 'A') || "
+            "setweight(to_tsvector('simple', :tags), 'B') || "
+            "setweight(to_tsvector('simple', :description), 'C')) "
+            'ON CONFLICT (user_id) DO UPDATE SET document = EXCLUDED.document'
+        ),
+        documents
+    )
+
+
+def remove_users(user_ids):
+    """Drop the index entries for the given user ids."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    table = DOCUMENT_TABLE if dialects.is_sqlite() else SEARCH_TABLE
+    db.session.execute(
+        text(f'DELETE FROM {table} WHERE user_id = :user_id'),
+        [{'user_id': user_id} for user_id in user_ids]
+    )
+
+
+def rebuild_index(batch_size=1000):
+    """Re-index every user from scratch."""
+    from app.models import User
+
+    db.session.execute(text(f'DELETE FROM {DOCUMENT_TABLE if dialects.is_sqlite() else SEARCH_TABLE}'))
+    count = 0
+    batch = []
+    for user in User.query.order_by(User.id).yield_per(batch_size):
+        batch.append(user)
+        if len(batch) >= batch_size:
+            index_users(batch)
+            count += len(batch)
+            batch = []
+    index_users(batch)
+    count += len(batch)
+    logger.info(f"Indexed {count} users for search")
+    return count
+
+
+def ensure_index():
+    """Create the index if needed and backfill it when it is out of step with the user table."""
+    from app.models import User
+
+    create_index()
+    indexed = db.session.execute(
+        text(f'SELECT COUNT(*) FROM {DOCUMENT_TABLE if dialects.is_sqlite() else SEARCH_TABLE}')
+    ).scalar()
+    if indexed != User.query.count():
+        rebuild_index()
+    db.session.commit()
+
+
+def _terms(query):
+    return [term.lower() for term in TERM_PATTERN.findall(query or '')]
+
+
+def search_user_ids(query, limit, offset=0):
+    """Return ranked user ids matching every term of ``query``.
+
+    Each term is treated as a prefix so results update while the user types.
+    Name matches rank above tag matches, which rank above description matches.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    if dialects.is_sqlite():
+        match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        rows = db.session.execute(
+            text(
+                f'SELECT doc.user_id FROM {SEARCH_TABLE} '
+                f'JOIN {DOCUMENT_TABLE} AS doc ON doc.id = {SEARCH_TABLE}.rowid '
+                f'WHERE {SEARCH_TABLE} MATCH :match '
+                f'ORDER BY bm25({SEARCH_TABLE}, 10.0, 1.0, 5.0), doc.user_id '
+                'LIMIT :limit OFFSET :offset'
+            ),
+            {'match': match, 'limit': limit, 'offset': offset}
+        )
+        return [row.user_id for row in rows]
+
+    lexemes = [lexeme for term in terms for lexeme in TSQUERY_UNSAFE.sub(' ', term).split()]
+    if not lexemes:
+        return []
+    rows = db.session.execute(
+        text(
+            f"SELECT user_id FROM {SEARCH_TABLE}, to_tsquery('simple', :tsquery) AS query "
+            'WHERE document @@ query '
+            'ORDER BY ts_rank(document, query) DESC, user_id '
+            'LIMIT :limit OFFSET :offset'
+        ),
+        {'tsquery': ' & '.join(f'{lexeme}:*' for lexeme in lexemes), 'limit': limit, 'offset': offset}
+    )
+    return [row.user_id for row in rows]
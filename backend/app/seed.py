@@ -0,0 +1,371 @@
+import os
+import uuid
+import click
+from app import db
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+SAMPLE_USERS = [
+    {
+        'email': 'admin@example.com',
+        'name': 'Admin User',
+        'description': 'System administrator with full access',
+        'is_admin': True,
+        'tags': ['admin', 'tech', 'management'],
+        'team': 'IT',
+        'available_days': ['friday', 'saturday'],
+        'links': {'github': 'https://github.com/admin', 'linkedin': 'https://linkedin.com/in/admin'}
+    },
+    {
+        'email': 'weekend.dev@example.com',
+        'name': 'Sarah Weekend',
+        'description': 'Full-stack developer who prefers weekend work',
+        'tags': ['react', 'node.js', 'weekend-warrior', 'remote'],
+        'team': 'Full Stack',
+        'available_days': ['saturday'],
+        'links': {'github': 'https://github.com/sarahw', 'linkedin': 'https://linkedin.com/in/sarahw'}
+    },
+    {
+        'email': 'flexible.time@example.com',
+        'name': 'Alex Flexible',
+        'description': 'UI/UX designer with flexible schedule',
+        'tags': ['ui', 'ux', 'figma', 'design-systems', 'flexible'],
+        'team': 'Design',
+        'available_days': ['friday', 'saturday'],
+        'links': {'github': 'https://github.com/alexf', 'portfolio': 'https://alexf.design'}
+    },
+    {
+        'email': 'night.owl@example.com',
+        'name': 'Oliver Night',
+        'description': 'Backend developer who loves working weekends',
+        'tags': ['python', 'django', 'postgresql', 'night-shift'],
+        'team': 'Backend',
+        'available_days': ['saturday'],
+        'links': {'github': 'https://github.com/olivern', 'linkedin': 'https://linkedin.com/in/olivern'}
+    },
+    {
+        'email': 'emily.chen@example.com',
+        'name': 'Emily Chen',
+        'description': 'Full-stack developer with expertise in MERN stack',
+        'tags': ['frontend', 'backend', 'react', 'node.js', 'mongodb'],
+        'team': 'Full Stack',
+        'available_days': ['tuesday', 'thursday'],
+        'links': {'github': 'https://github.com/emilychen', 'portfolio': 'https://emilychen.dev'}
+    },
+    {
+        'email': 'marcus.rodriguez@example.com',
+        'name': 'Marcus Rodriguez',
+        'description': 'AI/ML engineer specializing in computer vision',
+        'tags': ['python', 'tensorflow', 'opencv', 'machine-learning'],
+        'team': 'AI',
+        'available_days': ['monday', 'wednesday', 'friday'],
+        'links': {'github': 'https://github.com/marcusai', 'research': 'https://scholar.google.com/marcus'}
+    },
+    {
+        'email': 'sophia.patel@example.com',
+        'name': 'Sophia Patel',
+        'description': 'Product designer with focus on accessibility',
+        'tags': ['ui', 'ux', 'accessibility', 'figma', 'sketch'],
+        'team': 'Design',
+        'available_days': ['tuesday', 'thursday'],
+        'links': {'portfolio': 'https://sophiadesigns.com', 'dribbble': 'https://dribbble.com/sophia'}
+    },
+    {
+        'email': 'liam.thompson@example.com',
+        'name': 'Liam Thompson',
+        'description': 'Cloud architect with multi-cloud expertise',
+        'tags': ['aws', 'azure', 'gcp', 'terraform', 'kubernetes'],
+        'team': 'DevOps',
+        'available_days': ['wednesday', 'friday'],
+        'links': {'github': 'https://github.com/liamcloud', 'blog': 'https://cloudwithLiam.com'}
+    },
+    {
+        'email': 'aisha.khan@example.com',
+        'name': 'Aisha Khan',
+        'description': 'Mobile app developer specializing in Flutter',
+        'tags': ['flutter', 'dart', 'mobile', 'firebase'],
+        'team': 'Mobile',
+        'available_days': ['monday', 'thursday'],
+        'links': {'github': 'https://github.com/aishak', 'playstore': 'https://play.google.com/aisha'}
+    },
+    {
+        'email': 'david.kim@example.com',
+        'name': 'David Kim',
+        'description': 'Security engineer focused on application security',
+        'tags': ['security', 'pentesting', 'oauth', 'cryptography'],
+        'team': 'Security',
+        'available_days': ['tuesday', 'friday'],
+        'links': {'github': 'https://github.com/secureDavid', 'blog': 'https://securitywithDavid.com'}
+    },
+    {
+        'email': 'nina.silva@example.com',
+        'name': 'Nina Silva',
+        'description': 'Data scientist specializing in NLP',
+        'tags': ['python', 'nlp', 'machine-learning', 'spacy'],
+        'team': 'Data Science',
+        'available_days': ['monday', 'wednesday'],
+        'links': {'github': 'https://github.com/ninasilva', 'kaggle': 'https://kaggle.com/nina'}
+    },
+    {
+        'email': 'alex.foster@example.com',
+        'name': 'Alex Foster',
+        'description': 'Game developer with Unity expertise',
+        'tags': ['unity', 'c#', 'game-dev', '3d-modeling'],
+        'team': 'Gaming',
+        'available_days': ['thursday', 'friday'],
+        'links': {'github': 'https://github.com/alexgames', 'itch': 'https://itch.io/alex'}
+    },
+    {
+        'email': 'maya.wong@example.com',
+        'name': 'Maya Wong',
+        'description': 'Technical writer and documentation specialist',
+        'tags': ['documentation', 'technical-writing', 'markdown'],
+        'team': 'Documentation',
+        'available_days': ['tuesday', 'wednesday'],
+        'links': {'portfolio': 'https://mayawrites.com', 'medium': 'https://medium.com/@maya'}
+    },
+    {
+        'email': 'carlos.garcia@example.com',
+        'name': 'Carlos Garcia',
+        'description': 'Backend developer specializing in microservices',
+        'tags': ['java', 'spring-boot', 'microservices', 'kafka'],
+        'team': 'Backend',
+        'available_days': ['monday', 'friday'],
+        'links': {'github': 'https://github.com/carlosg', 'linkedin': 'https://linkedin.com/in/carlosgarcia'}
+    },
+    {
+        'email': 'rachel.green@example.com',
+        'name': 'Rachel Green',
+        'description': 'Frontend developer focused on web accessibility',
+        'tags': ['react', 'typescript', 'accessibility', 'sass'],
+        'team': 'Frontend',
+        'available_days': ['wednesday', 'thursday'],
+        'links': {'github': 'https://github.com/rachelg', 'codepen': 'https://codepen.io/rachel'}
+    },
+    {
+        'email': 'thomas.mueller@example.com',
+        'name': 'Thomas Mueller',
+        'description': 'Blockchain developer and smart contract expert',
+        'tags': ['blockchain', 'solidity', 'ethereum', 'web3'],
+        'team': 'Blockchain',
+        'available_days': ['tuesday', 'friday'],
+        'links': {'github': 'https://github.com/thomasblockchain', 'medium': 'https://medium.com/@thomas'}
+    },
+    {
+        'email': 'priya.sharma@example.com',
+        'name': 'Priya Sharma',
+        'description': 'Quality assurance engineer specializing in automation',
+        'tags': ['selenium', 'cypress', 'testing', 'automation'],
+        'team': 'QA',
+        'available_days': ['monday', 'wednesday'],
+        'links': {'github': 'https://github.com/priyaqa', 'linkedin': 'https://linkedin.com/in/priyasharma'}
+    },
+    {
+        'email': 'james.wilson@example.com',
+        'name': 'James Wilson',
+        'description': 'DevOps engineer focusing on CI/CD pipelines',
+        'tags': ['jenkins', 'gitlab-ci', 'docker', 'ansible'],
+        'team': 'DevOps',
+        'available_days': ['tuesday', 'thursday'],
+        'links': {'github': 'https://github.com/jamesops', 'blog': 'https://devopswithJames.com'}
+    },
+    {
+        'email': 'emma.brown@example.com',
+        'name': 'Emma Brown',
+        'description': 'UX researcher with focus on user testing',
+        'tags': ['user-research', 'usability-testing', 'analytics'],
+        'team': 'Design',
+        'available_days': ['wednesday', 'friday'],
+        'links': {'portfolio': 'https://emmaux.design', 'medium': 'https://medium.com/@emma'}
+    },
+    {
+        'email': 'ryan.zhang@example.com',
+        'name': 'Ryan Zhang',
+        'description': 'Systems architect specializing in distributed systems',
+        'tags': ['architecture', 'distributed-systems', 'scalability'],
+        'team': 'Architecture',
+        'available_days': ['monday', 'thursday'],
+        'links': {'github': 'https://github.com/ryanarch', 'blog': 'https://systemswithRyan.com'}
+    },
+    {
+        'email': 'lisa.anderson@example.com',
+        'name': 'Lisa Anderson',
+        'description': 'Content strategist and technical copywriter',
+        'tags': ['content-strategy', 'copywriting', 'seo'],
+        'team': 'Content',
+        'available_days': ['tuesday', 'friday'],
+        'links': {'portfolio': 'https://lisawrites.com', 'twitter': 'https://twitter.com/lisatech'}
+    },
+    {
+        'email': 'michael.lee@example.com',
+        'name': 'Michael Lee',
+        'description': 'Database administrator and performance tuning expert',
+        'tags': ['postgresql', 'mysql', 'mongodb', 'optimization'],
+        'team': 'Database',
+        'available_days': ['monday', 'wednesday'],
+        'links': {'github': 'https://github.com/michaeldb', 'blog': 'https://dbwithMichael.com'}
+    },
+    {
+        'email': 'sarah.miller@example.com',
+        'name': 'Sarah Miller',
+        'description': 'AR/VR developer specializing in Unity',
+        'tags': ['unity', 'ar', 'vr', 'c#'],
+        'team': 'AR/VR',
+        'available_days': ['thursday', 'friday'],
+        'links': {'github': 'https://github.com/sarahvr', 'portfolio': 'https://sarahvr.tech'}
+    },
+    {
+        'email': 'daniel.taylor@example.com',
+        'name': 'Daniel Taylor',
+        'description': 'IoT specialist and embedded systems developer',
+        'tags': ['iot', 'embedded', 'raspberry-pi', 'arduino'],
+        'team': 'IoT',
+        'available_days': ['tuesday', 'wednesday'],
+        'links': {'github': 'https://github.com/danieliot', 'hackaday': 'https://hackaday.io/daniel'}
+    },
+    {
+        'email': 'olivia.martin@example.com',
+        'name': 'Olivia Martin',
+        'description': 'Performance engineer focusing on web optimization',
+        'tags': ['performance', 'optimization', 'webpack', 'lighthouse'],
+        'team': 'Performance',
+        'available_days': ['monday', 'friday'],
+        'links': {'github': 'https://github.com/oliviaperf', 'blog': 'https://perfwithOlivia.com'}
+    },
+    {
+        'email': 'kevin.nguyen@example.com',
+        'name': 'Kevin Nguyen',
+        'description': 'Mobile game developer with Unity and Unreal expertise',
+        'tags': ['unity', 'unreal-engine', 'mobile-gaming', 'c++'],
+        'team': 'Gaming',
+        'available_days': ['wednesday', 'thursday'],
+        'links': {'github': 'https://github.com/kevingames', 'portfolio': 'https://kevingames.dev'}
+    },
+    {
+        'email': 'anna.kowalski@example.com',
+        'name': 'Anna Kowalski',
+        'description': 'Data engineer specializing in big data technologies',
+        'tags': ['apache-spark', 'hadoop', 'python', 'scala'],
+        'team': 'Data',
+        'available_days': ['tuesday', 'friday'],
+        'links': {'github': 'https://github.com/annadata', 'linkedin': 'https://linkedin.com/in/annakowalski'}
+    },
+    {
+        'email': 'chris.baker@example.com',
+        'name': 'Chris Baker',
+        'description': 'Release manager and deployment specialist',
+        'tags': ['deployment', 'release-management', 'jenkins', 'gitops'],
+        'team': 'DevOps',
+        'available_days': ['monday', 'wednesday'],
+        'links': {'github': 'https://github.com/chrisops', 'blog': 'https://releaseswithChris.com'}
+    },
+    {
+        'email': 'jessica.white@example.com',
+        'name': 'Jessica White',
+        'description': 'Accessibility specialist and frontend developer',
+        'tags': ['accessibility', 'wcag', 'react', 'aria'],
+        'team': 'Frontend',
+        'available_days': ['tuesday', 'thursday'],
+        'links': {'github': 'https://github.com/jessicaa11y', 'blog': 'https://a11ywithJessica.com'}
+    },
+    {
+        'email': 'mohammed.ali@example.com',
+        'name': 'Mohammed Ali',
+        'description': 'Cloud security architect and compliance expert',
+        'tags': ['security', 'aws', 'compliance', 'identity'],
+        'team': 'Security',
+        'available_days': ['wednesday', 'friday'],
+        'links': {'github': 'https://github.com/mohammedsec', 'blog': 'https://cloudsecuritywithMo.com'}
+    },
+    {
+        'email': 'sofia.lopez@example.com',
+        'name': 'Sofia Lopez',
+        'description': 'API designer and integration specialist',
+        'tags': ['api-design', 'rest', 'graphql', 'swagger'],
+        'team': 'Backend',
+        'available_days': ['monday', 'thursday'],
+        'links': {'github': 'https://github.com/sofiaapi', 'blog': 'https://apiswithSofia.com'}
+    },
+    {
+        'email': 'william.clark@example.com',
+        'name': 'William Clark',
+        'description': 'Build and automation engineer',
+        'tags': ['ci-cd', 'automation', 'gradle', 'maven'],
+        'team': 'DevOps',
+        'available_days': ['tuesday', 'friday'],
+        'links': {'github': 'https://github.com/willbuild', 'gitlab': 'https://gitlab.com/willclark'}
+    },
+    {
+        'email': 'elena.popov@example.com',
+        'name': 'Elena Popov',
+        'description': 'Machine learning engineer specializing in recommendation systems',
+        'tags': ['machine-learning', 'python', 'recommendation-systems', 'pytorch'],
+        'team': 'AI',
+        'available_days': ['monday', 'wednesday'],
+        'links': {'github': 'https://github.com/elenaml', 'research': 'https://scholar.google.com/elena'}
+    },
+    {
+        'email': 'lucas.santos@example.com',
+        'name': 'Lucas Santos',
+        'description': 'Quantum computing researcher and developer',
+        'tags': ['quantum-computing', 'qiskit', 'python', 'physics'],
+        'team': 'Research',
+        'available_days': ['thursday', 'friday'],
+        'links': {'github': 'https://github.com/lucasquantum', 'research': 'https://quantum.lab/lucas'}
+    }
+]
+
+
+def init_migrations(app):
+    """Register Flask-Migrate (and its ``flask db`` commands).
+
+    Alembic is slow to import and only needed for schema changes, so
+    web workers never load it.
+    """
+    if 'migrate' in app.extensions:
+        return
+    from flask_migrate import Migrate
+    Migrate(app, db, directory=MIGRATIONS_DIRECTORY, render_as_batch=True)
+
+
+def add_sample_users():
+    """Insert the sample users if the user table is empty. Returns how many were added."""
+    from app import facets, versions
+    from app.models import User
+
+    if db.session.query(User.id).first() is not None:
+        return 0
+    for user_data in SAMPLE_USERS:
+        db.session.add(User(id=str(uuid.uuid4()), **user_data))
+    facets.adjust_tag_counts(added=[user_data['tags'] for user_data in SAMPLE_USERS])
+    versions.bump(versions.USERS, versions.TAGS)
+    db.session.commit()
+    return len(SAMPLE_USERS)
+
+
+def seed(app, sample_users=True):
+    """Bring the database up to date: migrations, sample data and the search index.
+
+    Safe to run repeatedly; every step is a no-op when there is nothing to do.
+    """
+    from flask_migrate import upgrade
+    from app import search
+
+    init_migrations(app)
+    with app.app_context():
+        click.echo('Applying database migrations...')
+        upgrade()
+        if sample_users:
+            added = add_sample_users()
+            click.echo(f'Added {added} sample users' if added else 'Users exist, skipping sample data')
+        # Build or backfill the full-text search index
+        search.ensure_index()
+        click.echo('Search index is up to date')
+
+
+def init_app(app):
+    @app.cli.command('seed')
+    @click.option('--no-sample-users', is_flag=True, help='Only migrate and index; do not add sample users.')
+    def seed_command(no_sample_users):
+        """Create or upgrade the schema and load sample data. Run once per deploy."""
+        seed(app, sample_users=not no_sample_users)
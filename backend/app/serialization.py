@@ -0,0 +1,156 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from app import db, metrics, replicas, versions
+from app.models import User
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder produces the same bytes, only slower
+    orjson = None
+
+# Sorted keys and no whitespace, like Flask's compact output. Datetimes and
+# dataclasses go through Flask's default() so they render as they always have.
+ORJSON_OPTIONS = (
+    (orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+    if orjson is not None else 0
+)
+
+# Floats orjson formats differently: exponents (1e16, stdlib 1e+16) and
+# small values it writes out in full (0.00001, stdlib 1e-05)
+_FLOAT_MISMATCH = re.compile(rb'\de|0\.0000')
+
+
+def dumps_bytes(obj, default=None):
+    """Encode ``obj`` exactly as Flask's compact jsonify() would, as ASCII bytes.
+
+    orjson handles the common case. Output it would render differently
+    (non-ASCII text and DEL, which the stdlib escapes; some floats; types
+    it rejects such as non-string keys) is re-encoded with the stdlib.
+    """
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+        except TypeError:  # includes orjson.JSONEncodeError
+            data = None
+        # orjson writes DEL (0x7f) raw where the stdlib writes \u007f
+        if data is not None and data.isascii() and b'\x7f' not in data and not _FLOAT_MISMATCH.search(data):
+            return data
+    return json.dumps(
+        obj, default=default, ensure_ascii=True, sort_keys=True, separators=(',', ':')
+    ).encode('ascii')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that renders compact responses with orjson.
+
+    Bodies are byte-for-byte what DefaultJSONProvider produces; pretty
+    (debug) output still goes through the stdlib.
+    """
+
+    @property
+    def pretty(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def response(self, *args, **kwargs):
+        with metrics.serializing():
+            if self.pretty:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            return self.bytes_response(dumps_bytes(obj, default=self.default))
+
+    def bytes_response(self, body):
+        """Response for an already encoded JSON body."""
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+class EncodedUserCache:
+    """Per-process LRU of each user's encoded to_dict() JSON.
+
+    Entries belong to one version of the users data; a bump anywhere
+    empties the cache on the next lookup, so other workers never serve
+    bytes older than their ETags. Writes in this process also drop the
+    users they touched straight away.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, version, user_ids):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            found = {}
+            for user_id in user_ids:
+                data = self._entries.get(user_id)
+                if data is not None:
+                    self._entries.move_to_end(user_id)
+                    found[user_id] = data
+            return found
+
+    def set_many(self, version, encoded):
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries.update(encoded)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_json = EncodedUserCache()
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
+    user_json.maxsize = app.config['USER_JSON_CACHE_SIZE']
+
+
+def byte_assembly_enabled():
+    """True when list responses may be built from per-user bytes in this request."""
+    # Callers pinned to the primary must not get bytes cached from replica reads
+    return (user_json.maxsize > 0 and not current_app.json.pretty
+            and not replicas.pinned_to_primary(db))
+
+
+def encode_users(user_ids):
+    """Encoded to_dict() JSON for each of ``user_ids`` that exists, in order.
+
+    Users missing from the cache are loaded as plain column rows in one
+    query (plus one each for tags and days) and cached.
+    """
+    version, _ = versions.snapshot.get(versions.USERS)
+    encoded = user_json.get_many(version, user_ids)
+    missing = [user_id for user_id in user_ids if user_id not in encoded]
+    if missing:
+        rows = db.session.execute(
+            db.select(*User.api_columns()).where(User.id.in_(missing))
+        ).all()
+        default = current_app.json.default
+        with metrics.serializing():
+            loaded = {user['id']: dumps_bytes(user, default) for user in User.rows_to_dicts(rows)}
+        user_json.set_many(version, loaded)
+        encoded.update(loaded)
+    return [encoded[user_id] for user_id in user_ids if user_id in encoded]
+
+
+def users_response(user_ids):
+    """JSON array response of the given users, assembled from their encoded bytes."""
+    encoded = encode_users(user_ids)
+    with metrics.serializing():
+        return current_app.json.bytes_response(b'[' + b','.join(encoded) + b']')
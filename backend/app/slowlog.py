@@ -0,0 +1,326 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from flask import has_request_context, request
+from sqlalchemy import event
+from app.querybudget import normalize
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; there each process must use its own SLOW_QUERY_LOG
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Statements EXPLAIN accepts; anything else (PRAGMA, DDL, transaction control) is logged without a plan
+EXPLAINABLE = ('select', 'insert', 'update', 'delete', 'with')
+MAX_SQL_LENGTH = 10000
+MAX_LISTED_PARAMS = 20
+
+settings = {
+    'threshold': 0.0,  # seconds; 0 disables
+    'explain': True,
+    'explain_analyze': True,
+    'explain_interval': 300,
+    'explain_timeout_ms': 10000
+}
+
+# The explain thread's own statements must not be logged again
+_local = threading.local()
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that every gunicorn worker can point at the same file.
+
+    Writes and rollovers happen under an exclusive lock on a ``.lock`` file
+    next to the log, and a process reopens the log when another one has
+    rotated it away.
+    """
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._lock_file = None
+
+    def close(self):
+        super().close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _rotated_away(self):
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except OSError:
+            return True
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        if self._lock_file is None:
+            self._lock_file = open(self.baseFilename + '.lock', 'a')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            if self.stream is not None and self._rotated_away():
+                self.stream.close()
+                self.stream = self._open()
+            super().emit(record)
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+
+def redact(value):
+    """Parameters as types and sizes only: numbers, booleans and NULLs are kept,
+    text and bytes are replaced, long lists are cut short."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return f'<str len={len(value)}>'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<bytes len={len(value)}>'
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        redacted = [redact(item) for item in value[:MAX_LISTED_PARAMS]]
+        if len(value) > MAX_LISTED_PARAMS:
+            redacted.append(f'<{len(value) - MAX_LISTED_PARAMS} more>')
+        return redacted
+    return f'<{type(value).__name__}>'
+
+
+def _origin():
+    if has_request_context():
+        rule = request.url_rule
+        return {
+            'route': f'{request.method} {rule.rule if rule is not None else request.path}',
+            'endpoint': request.endpoint
+        }
+    return {'route': None, 'endpoint': None, 'thread': threading.current_thread().name}
+
+
+def explain_sql(dialect, statement):
+    """The EXPLAIN statement for ``statement``, or None when it cannot be explained.
+
+    PostgreSQL runs SELECTs again under ANALYZE to report actual rows,
+    timings and buffer use. Writes only get an estimated plan, since
+    ANALYZE would apply them a second time.
+    """
+    if statement.lstrip().split(None, 1)[0].lower() not in EXPLAINABLE:
+        return None
+    if dialect == 'sqlite':
+        return f'EXPLAIN QUERY PLAN {statement}'
+    if dialect == 'postgresql':
+        is_select = statement.lstrip()[:6].lower() == 'select' and 'for update' not in statement.lower()
+        if is_select and settings['explain_analyze']:
+            return f'EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) {statement}'
+        return f'EXPLAIN {statement}'
+    return f'EXPLAIN {statement}'
+
+
+def run_explain(engine, statement, parameters):
+    sql = explain_sql(engine.dialect.name, statement)
+    if sql is None:
+        return None
+    _local.explaining = True
+    try:
+        with engine.connect() as conn:
+            if engine.dialect.name == 'postgresql':
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings['explain_timeout_ms'])}")
+            rows = conn.exec_driver_sql(sql, parameters).all()
+            conn.rollback()
+    finally:
+        _local.explaining = False
+    if engine.dialect.name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+class ExplainWorker(threading.Thread):
+    """Background thread that explains slow statements and writes them to the log.
+
+    Each statement shape is explained at most once per ``explain_interval``
+    seconds in this process; entries in between carry no plan.
+    """
+
+    def __init__(self, write, maxsize=1000):
+        super().__init__(name='slow-query-log', daemon=True)
+        self.write = write
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._explained_at = {}
+
+    def submit(self, engine, entry, parameters):
+        try:
+            self.queue.put_nowait((engine, entry, parameters))
+        except queue.Full:
+            self.dropped += 1
+
+    def _due(self, shape):
+        now = time.monotonic()
+        last = self._explained_at.get(shape)
+        if last is not None and now - last < settings['explain_interval']:
+            return False
+        self._explained_at[shape] = now
+        return True
+
+    def run(self):
+        while True:
+            engine, entry, parameters = self.queue.get()
+            try:
+                if settings['explain'] and self._due(entry['shape']):
+                    entry['plan'] = run_explain(engine, entry['sql'], parameters)
+            except Exception as e:
+                entry['plan_error'] = str(e)
+            try:
+                self.write(entry)
+            except Exception as e:
+                logger.error(f"Slow query log error: {str(e)}")
+
+
+class SlowQueryLog:
+    """The slow query file: its writer, this process's explain thread, and the summary."""
+
+    def __init__(self):
+        self.path = None
+        self.logger = None
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def configure(self, path, max_bytes, backups):
+        self.path = os.path.abspath(path)
+        self.logger = logging.getLogger('app.slowlog.entries')
+        self.logger.setLevel(logging.INFO)
+        # Entries go to the slow query file only, never to the app log
+        self.logger.propagate = False
+        for handler in list(self.logger.handlers):
+            if getattr(handler, 'baseFilename', None) == self.path:
+                return
+            self.logger.removeHandler(handler)
+            handler.close()
+        handler = SharedRotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups, delay=True)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.logger.addHandler(handler)
+
+    def _write(self, entry):
+        self.logger.info(json.dumps(entry, default=str, sort_keys=True))
+
+    @property
+    def dropped(self):
+        return self._worker.dropped if self._worker is not None else 0
+
+    def worker(self):
+        """This process's explain thread, started on the first slow statement."""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = ExplainWorker(self._write)
+                self._worker.start()
+            return self._worker
+
+    def entries(self):
+        """Every entry in the log and its rotated backups, oldest file first."""
+        if self.path is None:
+            return
+        directory, name = os.path.split(self.path)
+        try:
+            names = [entry for entry in os.listdir(directory) if entry == name or entry.startswith(name + '.')]
+        except OSError:
+            return
+        backups = sorted((entry for entry in names if entry[len(name) + 1:].isdigit()),
+                         key=lambda entry: -int(entry[len(name) + 1:]))
+        for entry in backups + ([name] if name in names else []):
+            with open(os.path.join(directory, entry)) as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def summary(self, limit=20, since=None):
+        """Top statement shapes by total time spent above the threshold."""
+        shapes = {}
+        for entry in self.entries():
+            if since is not None and entry['time'] < since:
+                continue
+            shape = shapes.setdefault(entry['shape'], {
+                'shape': entry['shape'], 'count': 0, 'totalMs': 0.0, 'maxMs': 0.0,
+                'routes': Counter(), 'lastSeen': None, 'slowest': None, 'plan': None
+            })
+            shape['count'] += 1
+            shape['totalMs'] += entry['duration_ms']
+            shape['routes'][entry.get('route') or entry.get('thread') or 'unknown'] += 1
+            shape['lastSeen'] = max(shape['lastSeen'] or entry['time'], entry['time'])
+            if entry['duration_ms'] >= shape['maxMs']:
+                shape['maxMs'] = entry['duration_ms']
+                shape['slowest'] = {key: entry.get(key) for key in ('time', 'sql', 'params', 'route', 'database')}
+            if entry.get('plan') is not None:
+                shape['plan'] = entry['plan']
+        top = sorted(shapes.values(), key=lambda shape: shape['totalMs'], reverse=True)[:limit]
+        for shape in top:
+            shape['totalMs'] = round(shape['totalMs'], 2)
+            shape['avgMs'] = round(shape['totalMs'] / shape['count'], 2)
+            shape['routes'] = dict(shape['routes'].most_common(5))
+        return {'shapes': len(shapes), 'top': top}
+
+
+slow_queries = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slowlog_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_slowlog_started', None)
+    if started is None or getattr(_local, 'explaining', False):
+        return
+    duration = time.perf_counter() - started
+    if duration < settings['threshold']:
+        return
+    if executemany:
+        rows, parameters = len(parameters), parameters[0] if parameters else None
+    else:
+        rows = None
+    entry = {
+        'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'duration_ms': round(duration * 1000, 2),
+        'sql': statement[:MAX_SQL_LENGTH],
+        'shape': normalize(statement)[:MAX_SQL_LENGTH],
+        'params': redact(parameters),
+        'executemany': rows,
+        'dialect': conn.engine.dialect.name,
+        'database': conn.engine.url.render_as_string(hide_password=True),
+        'pid': os.getpid(),
+        **_origin()
+    }
+    # Raw parameters go to EXPLAIN only and are never written out
+    slow_queries.worker().submit(conn.engine, entry, parameters)
+
+
+def attach_engine(engine):
+    """Time every statement on ``engine`` against the threshold."""
+    if not event.contains(engine, 'after_cursor_execute', _after_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_app(app, db):
+    """Log statements slower than SLOW_QUERY_MS on every engine (0 turns it off)."""
+    settings.update(
+        threshold=app.config['SLOW_QUERY_MS'] / 1000,
+        explain=app.config['SLOW_QUERY_EXPLAIN'],
+        explain_analyze=app.config['SLOW_QUERY_EXPLAIN_ANALYZE'],
+        explain_interval=app.config['SLOW_QUERY_EXPLAIN_INTERVAL']
+    )
+    if not app.config['SLOW_QUERY_MS']:
+        return
+    slow_queries.configure(app.config['SLOW_QUERY_LOG'], app.config['SLOW_QUERY_LOG_MAX_BYTES'],
+                           app.config['SLOW_QUERY_LOG_BACKUPS'])
+    with app.app_context():
+        for engine in db.engines.values():
+            attach_engine(engine)
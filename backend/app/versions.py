@@ -0,0 +1,134 @@
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, make_response, request
+from sqlalchemy import event
+from app import compression, db, dialects, replicas
+from app.models import DataVersion
+
+# Version names; a write bumps every name whose responses it changes
+USERS = 'users'
+TAGS = 'tags'
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class VersionSnapshot:
+    """Per-process copy of the data_version table.
+
+    Re-read at most every ``ttl`` seconds, and right away after this process
+    commits a bump, so a conditional GET usually costs no query at all.
+    Writes in other processes show up within ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl=1.0):
+        self.ttl = ttl
+        self._versions = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def get(self, name):
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    # Read from a replica when there is one: a version never runs ahead
+                    # of the data served with it, so stale replica data cannot be cached
+                    # or validated under a newer version
+                    replica = replicas.replica_engine(db)
+                    rows = db.session.execute(
+                        db.select(DataVersion.name, DataVersion.version, DataVersion.changed_at),
+                        bind_arguments={'bind': replica} if replica is not None else None
+                    ).all()
+                    self._versions = {row.name: (row.version, row.changed_at) for row in rows}
+                    self._loaded_at = time.monotonic()
+        return self._versions.get(name, (0, EPOCH))
+
+
+snapshot = VersionSnapshot()
+
+
+def bump(*names):
+    """Advance the given versions in the current transaction."""
+    now = datetime.utcnow()
+    insert = dialects.insert(DataVersion.__table__)
+    db.session.execute(
+        insert.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': insert.table.c.version + 1, 'changed_at': now}
+        ),
+        [{'name': name, 'version': 1, 'changed_at': now} for name in names]
+    )
+    db.session.info['bumped_versions'] = True
+
+
+def _after_commit(session):
+    if session.info.pop('bumped_versions', False):
+        snapshot.invalidate()
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('bumped_versions', None)
+
+
+def init_app(app):
+    snapshot.ttl = app.config['DATA_VERSION_TTL']
+    if not event.contains(db.session, 'after_commit', _after_commit):
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_soft_rollback', _after_rollback)
+
+
+def parse_etag(etag):
+    """``(name, version)`` for an ETag sent by conditional(), or None."""
+    name, _, version = compression.identity_etag(etag).rpartition('-')
+    if not name or not version.isdigit():
+        return None
+    return name, int(version)
+
+
+def conditional(name):
+    """Serve a GET view with validators from the ``name`` data version.
+
+    The response carries a strong ETag and Last-Modified derived from the
+    version. A matching If-None-Match (or, without one, an If-Modified-Since
+    at or after the last change) is answered with 304 before the view runs.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Versions come from the replicas, so they cannot validate what a
+            # caller pinned to the primary (after its own write) reads
+            if replicas.pinned_to_primary(db):
+                response = make_response(view(*args, **kwargs))
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+
+            version, changed_at = snapshot.get(name)
+            etag = f'{name}-{version}'
+            last_modified = changed_at.replace(microsecond=0, tzinfo=timezone.utc)
+
+            not_modified = False
+            if request.if_none_match:
+                # The client may hold the tag of the encoded representation (see app/compression.py)
+                encoding = compression.negotiate()
+                if encoding and request.if_none_match.contains(compression.encoded_etag(etag, encoding)):
+                    etag = compression.encoded_etag(etag, encoding)
+                not_modified = request.if_none_match.contains(etag)
+            elif request.if_modified_since:
+                not_modified = request.if_modified_since >= last_modified
+
+            response = current_app.response_class(status=304) if not_modified else make_response(view(*args, **kwargs))
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                response.last_modified = last_modified
+                # Let clients keep the body but revalidate before every use
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1 @@
+"""Endpoint benchmarks; see benchmarks/README.md."""
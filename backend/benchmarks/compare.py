@@ -0,0 +1,61 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+
+Exits with status 1 when any benchmark got slower than ``--threshold``
+(throughput or p99) or issues more queries per request.
+"""
+import argparse
+import json
+import sys
+
+
+def _change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(before, after, threshold):
+    """Yield ``(size, name, row, regressed)`` for benchmarks present in both reports."""
+    for size, results in after['results'].items():
+        baseline = before['results'].get(size, {}).get('benchmarks', {})
+        for name, current in results['benchmarks'].items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            throughput = _change(previous['ops_per_sec'], current['ops_per_sec'])
+            p99 = _change(previous['p99_ms'], current['p99_ms'])
+            queries = current['queries_per_op'] - previous['queries_per_op']
+            regressed = throughput < -threshold or p99 > threshold or queries > 0
+            yield size, name, (previous, current, throughput, p99, queries), regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed slowdown in percent (default 10)')
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f'{before["meta"].get("commit")} -> {after["meta"].get("commit")}')
+    for setting in ('cache', 'iterations', 'write_iterations', 'batch', 'seed'):
+        if before['meta'].get(setting) != after['meta'].get(setting):
+            print(f'warning: runs differ in {setting} ({before["meta"].get(setting)} vs {after["meta"].get(setting)})')
+    print(f'{"size":>7}  {"benchmark":<14} {"ops/s":>17} {"change":>8} {"p99 ms":>19} {"change":>8} {"queries":>13}')
+    regressions = 0
+    for size, name, (previous, current, throughput, p99, queries), regressed in compare(before, after, args.threshold):
+        regressions += regressed
+        print(f'{size:>7}  {name:<14} {previous["ops_per_sec"]:>8} {current["ops_per_sec"]:>8} {throughput:>+7.1f}% '
+              f'{previous["p99_ms"]:>9} {current["p99_ms"]:>9} {p99:>+7.1f}% '
+              f'{previous["queries_per_op"]:>6} {current["queries_per_op"]:>6}{"  REGRESSION" if regressed else ""}')
+    if regressions:
+        print(f'{regressions} regression(s) beyond {args.threshold}%')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+"""End-to-end load test of wsgi:app under gunicorn on localhost.
+
+Boots gunicorn with gunicorn_config.py once per worker setup (class,
+count and threads), replays a weighted traffic mix at rising
+concurrency, and reports throughput, p50/p95/p99 latency, error rate
+and worker RSS per level. For each setup it notes the highest
+concurrency that met the latency SLO, then recommends the setup with
+the best throughput within it.
+
+    python -m benchmarks.loadtest
+    python -m benchmarks.loadtest --configs gevent:9,gthread:5:4,sync:9 --concurrency 8,32,128 --duration 20
+    python -m benchmarks.loadtest --mix browse=80,profile=20 --database-url postgresql://...
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from benchmarks.run import BACKEND_DIR, RESULTS_DIR, percentile, populate, _git
+
+SCENARIOS = ('browse', 'profile', 'tags', 'login', 'import')
+DEFAULT_MIX = 'browse=60,profile=25,tags=10,login=4,import=1'
+IMPORT_DOMAIN = 'load-import.example.com'
+IMPORT_BATCH = 10
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'unknown scenario {name!r}; choose from {", ".join(SCENARIOS)}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_configs(value):
+    """``class:workers[:threads]`` entries, e.g. ``gevent:9,gthread:5:4,sync:9``."""
+    configs = []
+    for part in value.split(','):
+        fields = part.strip().split(':')
+        if len(fields) not in (2, 3) or fields[0] not in ('sync', 'gthread', 'gevent'):
+            raise argparse.ArgumentTypeError(f'bad worker setup {part!r}; use class:workers[:threads]')
+        configs.append({
+            'worker_class': fields[0],
+            'workers': int(fields[1]),
+            'threads': int(fields[2]) if len(fields) == 3 else 1
+        })
+    return configs
+
+
+def default_configs():
+    """The current gunicorn_config.py setup next to smaller and thread-based alternatives."""
+    cpus = os.cpu_count() or 1
+    return parse_configs(f'gevent:{cpus * 2 + 1},gevent:{cpus + 1},gthread:{cpus + 1}:4,sync:{cpus * 2 + 1}')
+
+
+def config_label(config):
+    label = f'{config["worker_class"]} x{config["workers"]}'
+    return label + (f' ({config["threads"]} threads)' if config['worker_class'] == 'gthread' else '')
+
+
+def prepare_database(args):
+    """Child process: create and seed the database, and write the request targets."""
+    from app import create_app, db, dialects, seed as seeding
+    from app.models import User
+    from app.pagination import encode_cursor
+    from app.routes import generate_token
+
+    app = create_app()
+    seeding.seed(app, sample_users=False)
+    with app.app_context():
+        if db.session.query(User.id).first() is None:
+            populate(args.users, args.seed)
+        ids = list(db.session.execute(db.select(User.id).order_by(User.id)).scalars())
+        admin_id = db.session.execute(db.select(User.id).where(User.is_admin)).scalar()
+        emails = list(db.session.execute(db.select(User.email).limit(1000)).scalars())
+        if dialects.is_sqlite():
+            # Fold the WAL into the main file so it can be copied per run
+            db.session.execute(db.text('PRAGMA wal_checkpoint(TRUNCATE)'))
+    rng = random.Random(args.seed)
+    targets = {
+        'admin_token': generate_token(admin_id),
+        'user_ids': rng.sample(ids, min(1000, len(ids))),
+        'emails': emails,
+        'cursors': [None] + [encode_cursor(ids[index]) for index in range(49, min(len(ids), 50 * 50), 50)]
+    }
+    with open(args.prepare_targets, 'w') as f:
+        json.dump(targets, f)
+
+
+def build_request(scenario, targets, rng, sequence):
+    """Method, path, body and headers for one request of ``scenario``."""
+    if scenario == 'browse':
+        cursor = rng.choice(targets['cursors'])
+        return 'GET', '/api/users?limit=50' + (f'&cursor={cursor}' if cursor else ''), None, {}
+    if scenario == 'profile':
+        return 'GET', f'/api/users/{rng.choice(targets["user_ids"])}', None, {}
+    if scenario == 'tags':
+        return 'GET', '/api/tags', None, {}
+    if scenario == 'login':
+        body = json.dumps({'email': rng.choice(targets['emails'])})
+        return 'POST', '/api/auth/login', body, {'Content-Type': 'application/json'}
+    from benchmarks.synthetic import generate_users
+    rows = list(generate_users(IMPORT_BATCH, start=sequence * IMPORT_BATCH, domain=IMPORT_DOMAIN))
+    headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {targets["admin_token"]}'}
+    return 'POST', '/api/users/import', json.dumps({'data': rows}), headers
+
+
+def _send(connection, method, path, body, headers):
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    return response
+
+
+def _client_thread(port, deadline, mix, targets, seed, sequences, samples):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    connection = None
+    while time.monotonic() < deadline:
+        scenario = rng.choices(names, weights=weights)[0]
+        method, path, body, headers = build_request(scenario, targets, rng, next(sequences))
+        started = time.perf_counter()
+        try:
+            try:
+                reused = connection is not None
+                if connection is None:
+                    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                response = _send(connection, method, path, body, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # An idle keep-alive connection closed by a recycled worker; retry once like browsers do
+                connection.close()
+                if not reused:
+                    raise
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                response = _send(connection, method, path, body, headers)
+            status = response.status
+            # sync workers close the connection after every response
+            if response.will_close:
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException) as error:
+            status = type(error).__name__
+            if connection is not None:
+                connection.close()
+            connection = None
+        samples.append((scenario, time.perf_counter() - started, status))
+
+
+def _client_process(job):
+    """Run ``threads`` clients until the deadline; return their samples."""
+    port, threads, duration, mix, targets, seed = job
+    deadline = time.monotonic() + duration
+    # Unique import emails across processes and threads
+    counter = iter(range(seed * 10 ** 7, (seed + 1) * 10 ** 7))
+    lock = threading.Lock()
+
+    def sequences():
+        while True:
+            with lock:
+                yield next(counter)
+
+    samples = []
+    clients = [
+        threading.Thread(target=_client_thread,
+                         args=(port, deadline, mix, targets, seed * 1000 + index, sequences(), samples))
+        for index in range(threads)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return samples
+
+
+def latency_summary(latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    return {
+        f'p{int(fraction * 100)}_ms': round(percentile(latencies, fraction) * 1000, 2)
+        for fraction in (0.50, 0.95, 0.99)
+    }
+
+
+def _is_error(status):
+    """HTTP 4xx/5xx, or the name of the exception that stopped the request."""
+    return not isinstance(status, int) or status >= 400
+
+
+def worker_rss(master_pid):
+    """RSS in MB of each gunicorn worker (Linux /proc only; empty elsewhere)."""
+    rss = []
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            if parent != master_pid:
+                continue
+            with open(f'/proc/{entry}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss.append(int(line.split()[1]) / 1024)
+        except (OSError, ValueError, IndexError):
+            continue
+    return rss
+
+
+def run_level(port, concurrency, duration, mix, targets, client_processes, master_pid, level_seed):
+    processes = max(1, min(client_processes, concurrency))
+    shares = [concurrency // processes + (1 if index < concurrency % processes else 0) for index in range(processes)]
+    jobs = [(port, threads, duration, mix, targets, level_seed * 100 + index) for index, threads in enumerate(shares)]
+    with multiprocessing.get_context('spawn').Pool(processes) as pool:
+        samples = [sample for result in pool.map(_client_process, jobs) for sample in result]
+    rss = worker_rss(master_pid)
+
+    failed = [(name, status) for name, _, status in samples if _is_error(status)]
+    level = {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / duration, 1),
+        'error_rate': round(len(failed) / len(samples), 4) if samples else None,
+        **latency_summary([latency for _, latency, _ in samples]),
+        'worker_rss_mb': {'total': round(sum(rss), 1), 'max': round(max(rss), 1)} if rss else None,
+        'scenarios': {}
+    }
+    for scenario in mix:
+        errors = Counter(str(status) for name, status in failed if name == scenario)
+        level['scenarios'][scenario] = {
+            'requests': sum(1 for name, _, _ in samples if name == scenario),
+            'errors': dict(errors),
+            **latency_summary([latency for name, latency, _ in samples if name == scenario])
+        }
+    return level
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(config, port, env, log_path):
+    command = [
+        sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', 'wsgi:app',
+        '--bind', f'127.0.0.1:{port}',
+        '--worker-class', config['worker_class'],
+        '--workers', str(config['workers']),
+        '--threads', str(config['threads']),
+        '--access-logfile', os.devnull,
+        '--error-logfile', log_path,
+        '--log-level', 'warning'
+    ]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_gunicorn(process)
+    with open(log_path) as f:
+        raise RuntimeError(f'gunicorn did not start ({config_label(config)}):\n{f.read()[-2000:]}')
+
+
+def stop_gunicorn(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def slo_summary(levels, slo_p99_ms, max_error_rate):
+    """Highest concurrency, and the best throughput, among levels that met the SLO."""
+    passing = [
+        level for level in levels
+        if level['p99_ms'] is not None and level['p99_ms'] <= slo_p99_ms
+        and level['error_rate'] is not None and level['error_rate'] <= max_error_rate
+    ]
+    for level in levels:
+        level['meets_slo'] = level in passing
+    return {
+        'max_concurrency': max((level['concurrency'] for level in passing), default=None),
+        'best_throughput_rps': max((level['throughput_rps'] for level in passing), default=None)
+    }
+
+
+def server_env(database_url):
+    env = dict(os.environ)
+    env.update({
+        'FLASK_ENV': 'production',
+        'DATABASE_URL': database_url,
+        'MAIL_SUPPRESS_SEND': 'True',
+        'MAIL_WORKER_IN_PROCESS': 'False',
+        # Keep the Google key prefetch off the network
+        'GOOGLE_CLIENT_ID': ''
+    })
+    return env
+
+
+def print_report(report):
+    slo = report['meta']['slo']
+    print(f'\nSLO: p99 <= {slo["p99_ms"]} ms, errors <= {slo["max_error_rate"] * 100:g}%')
+    for run in report['runs']:
+        print(f'\n{run["label"]}')
+        print(f'{"conc":>6} {"rps":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>8} {"RSS MB":>9}  SLO')
+        for level in run['levels']:
+            rss = level['worker_rss_mb']['total'] if level['worker_rss_mb'] else '-'
+            print(f'{level["concurrency"]:>6} {level["throughput_rps"]:>9} {level["p50_ms"]!s:>9} {level["p95_ms"]!s:>9} '
+                  f'{level["p99_ms"]!s:>9} {level["error_rate"] * 100 if level["error_rate"] is not None else 0:>7.2f}% '
+                  f'{rss!s:>9}  {"ok" if level["meets_slo"] else "MISS"}')
+    if report['recommendation']:
+        print(f'\nBest throughput within the SLO: {report["recommendation"]}')
+    else:
+        print('\nNo worker setup met the SLO')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configs', type=parse_configs, help='worker setups as class:workers[:threads], comma-separated '
+                        '(default: the gunicorn_config.py setup plus alternatives sized from the CPU count)')
+    parser.add_argument('--concurrency', default='1,4,16,64', help='comma-separated concurrent client counts')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=2, help='untimed seconds before the first level')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'scenario weights (default {DEFAULT_MIX})')
+    parser.add_argument('--users', type=int, default=10000, help='synthetic users in the temp SQLite database')
+    parser.add_argument('--database-url', help='run against this database instead of a fresh temp SQLite file')
+    parser.add_argument('--client-processes', type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help='load generator processes (threads are spread across them)')
+    parser.add_argument('--slo-p99-ms', type=float, default=500)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='report file (default: benchmarks/results/loadtest-<commit>.json)')
+    parser.add_argument('--prepare-targets', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.prepare_targets:
+        prepare_database(args)
+        return
+
+    configs = args.configs or default_configs()
+    levels = [int(value) for value in args.concurrency.split(',') if value]
+    report = {
+        'meta': {
+            'commit': _git('rev-parse', '--short', 'HEAD'),
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'cpus': os.cpu_count(),
+            'users': None if args.database_url else args.users,
+            'database': 'external' if args.database_url else 'sqlite',
+            'mix': args.mix,
+            'duration': args.duration,
+            'slo': {'p99_ms': args.slo_p99_ms, 'max_error_rate': args.max_error_rate}
+        },
+        'runs': [],
+        'recommendation': None
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        seeded = os.path.join(workdir, 'seeded.db')
+        database_url = args.database_url or f'sqlite:///{seeded}'
+        targets_path = os.path.join(workdir, 'targets.json')
+        print('Preparing database...', file=sys.stderr)
+        subprocess.run([sys.executable, '-m', 'benchmarks.loadtest', '--prepare-targets', targets_path,
+                        '--users', str(args.users), '--seed', str(args.seed)],
+                       cwd=BACKEND_DIR, env=server_env(database_url), stdout=subprocess.DEVNULL, check=True)
+        with open(targets_path) as f:
+            targets = json.load(f)
+
+        for index, config in enumerate(configs):
+            label = config_label(config)
+            # Every setup starts from the same data
+            run_url = database_url
+            if not args.database_url:
+                run_db = os.path.join(workdir, f'run{index}.db')
+                shutil.copyfile(seeded, run_db)
+                run_url = f'sqlite:///{run_db}'
+
+            print(f'{label}: starting gunicorn', file=sys.stderr)
+            port = free_port()
+            process = start_gunicorn(config, port, server_env(run_url), os.path.join(workdir, f'gunicorn{index}.log'))
+            try:
+                if args.warmup:
+                    run_level(port, min(4, max(levels)), args.warmup, args.mix, targets, 1, process.pid, args.seed)
+                run = {'label': label, **config, 'levels': []}
+                for step, concurrency in enumerate(levels):
+                    level = run_level(port, concurrency, args.duration, args.mix, targets,
+                                      args.client_processes, process.pid, args.seed + step + 1)
+                    run['levels'].append(level)
+                    print(f'  {concurrency} clients: {level["throughput_rps"]} req/s, p99 {level["p99_ms"]} ms, '
+                          f'errors {level["error_rate"]}', file=sys.stderr)
+            finally:
+                stop_gunicorn(process)
+            run['slo'] = slo_summary(run['levels'], args.slo_p99_ms, args.max_error_rate)
+            report['runs'].append(run)
+
+    within_slo = [run for run in report['runs'] if run['slo']['best_throughput_rps'] is not None]
+    if within_slo:
+        report['recommendation'] = max(within_slo, key=lambda run: run['slo']['best_throughput_rps'])['label']
+
+    path = args.output or os.path.join(RESULTS_DIR, f'loadtest-{report["meta"]["commit"] or "results"}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print_report(report)
+    print(f'\nReport written to {path}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""Endpoint micro-benchmarks through the Flask test client.
+
+Each directory size runs in a fresh process against its own temp-file
+SQLite database, seeded with synthetic users (see synthetic.py). Results
+are written as JSON; diff two runs with ``python -m benchmarks.compare``.
+
+    python -m benchmarks.run                                  # 1k, 10k and 100k users
+    python -m benchmarks.run --sizes 1000 --iterations 100 --only get_users,get_user
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+# Reads first, then writes; import runs before delete so delete can remove what it added
+BENCHMARK_ORDER = [
+    'get_users', 'get_user', 'get_tags', 'verify_login',
+    'update_user', 'import_users', 'delete_users'
+]
+WRITE_BENCHMARKS = {'update_user', 'import_users', 'delete_users'}
+IMPORT_DOMAIN = 'bench-import.example.com'
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class StatementCounter:
+    """Counts statements sent to the database (an executemany counts once)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def attach(self, engines):
+        from sqlalchemy import event
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self)
+
+
+def populate(size, seed, batch_size=1000):
+    """Insert an admin plus ``size - 1`` synthetic users with the set-based importer."""
+    from app import db, importer
+    from benchmarks.synthetic import generate_users
+
+    rows = [{'email': 'admin@example.com', 'name': 'Admin User', 'is_admin': True, 'tags': ['admin'], 'team': 'IT'}]
+    rows.extend(generate_users(size - 1, seed))
+    for start in range(0, len(rows), batch_size):
+        prepared = [
+            importer.prepare_row(row, start + offset + 1, allow_admin=True)[0]
+            for offset, row in enumerate(rows[start:start + batch_size])
+        ]
+        importer.insert_users(list(enumerate(prepared, start + 1)))
+        db.session.commit()
+
+
+class Context:
+    """State shared by the benchmarks of one directory size."""
+
+    def __init__(self, app, client, seed, batch):
+        from app import db
+        from app.models import User
+        from app.routes import generate_token
+
+        self.app = app
+        self.client = client
+        self.seed = seed
+        self.batch = batch
+        self.rng = random.Random(seed)
+        with app.app_context():
+            admin_id = db.session.execute(db.select(User.id).where(User.is_admin)).scalar()
+            self.user_ids = list(db.session.execute(
+                db.select(User.id).where(User.is_admin == False).order_by(User.id)  # noqa: E712
+            ).scalars())
+        self.admin = {'Authorization': f'Bearer {generate_token(admin_id)}'}
+        self.tokens = [
+            {'Authorization': f'Bearer {generate_token(user_id)}'}
+            for user_id in self.rng.sample(self.user_ids, min(100, len(self.user_ids)))
+        ]
+        self.next_import = 0
+
+    def imported_ids(self):
+        from app import db
+        from app.models import User
+        with self.app.app_context():
+            return list(db.session.execute(
+                db.select(User.id).where(User.email.like(f'%@{IMPORT_DOMAIN}'))
+            ).scalars())
+
+    def import_batch(self):
+        from benchmarks.synthetic import generate_users
+        rows = list(generate_users(self.batch, self.seed, start=self.next_import, domain=IMPORT_DOMAIN))
+        self.next_import += self.batch
+        return rows
+
+
+def benchmarks(ctx):
+    """name -> (prepare, call). ``prepare(i)`` runs untimed; ``call(args)`` is measured."""
+    def page_cursors(pages=20):
+        cursors, cursor = [None], None
+        for _ in range(pages - 1):
+            response = ctx.client.get('/api/users', query_string={'limit': 100, **({'cursor': cursor} if cursor else {})})
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            cursors.append(cursor)
+        return cursors
+
+    cursors = page_cursors()
+    pending_deletes = []
+
+    def prepare_delete(i):
+        if not pending_deletes:
+            pending_deletes.extend(ctx.imported_ids())
+        if len(pending_deletes) < ctx.batch:
+            # Nothing imported left to remove: add a batch outside the timing
+            ctx.client.post('/api/users/import', json={'data': ctx.import_batch()}, headers=ctx.admin)
+            pending_deletes.extend(set(ctx.imported_ids()) - set(pending_deletes))
+        batch = pending_deletes[:ctx.batch]
+        del pending_deletes[:ctx.batch]
+        return batch
+
+    return {
+        'get_users': (
+            lambda i: cursors[i % len(cursors)],
+            lambda cursor: ctx.client.get('/api/users', query_string={'limit': 100, **({'cursor': cursor} if cursor else {})})
+        ),
+        'get_user': (
+            lambda i: ctx.rng.choice(ctx.user_ids),
+            lambda user_id: ctx.client.get(f'/api/users/{user_id}')
+        ),
+        'get_tags': (
+            lambda i: {'withCounts': '1'} if i % 2 else {},
+            lambda args: ctx.client.get('/api/tags', query_string=args)
+        ),
+        'verify_login': (
+            lambda i: ctx.rng.choice(ctx.tokens),
+            lambda headers: ctx.client.get('/api/auth/verify', headers=headers)
+        ),
+        'update_user': (
+            lambda i: (ctx.rng.choice(ctx.user_ids), {
+                'name': f'Bench User {i}',
+                'tags': ctx.rng.sample(['python', 'react', 'docker', 'figma', 'remote', 'security'], 3)
+            }),
+            lambda args: ctx.client.put(f'/api/users/{args[0]}', json=args[1], headers=ctx.admin)
+        ),
+        'import_users': (
+            lambda i: ctx.import_batch(),
+            lambda rows: ctx.client.post('/api/users/import', json={'data': rows}, headers=ctx.admin)
+        ),
+        'delete_users': (
+            prepare_delete,
+            lambda user_ids: ctx.client.post('/api/users/delete', json={'userIds': user_ids}, headers=ctx.admin)
+        )
+    }
+
+
+def measure(prepare, call, iterations, warmup, counter):
+    for i in range(warmup):
+        call(prepare(i))
+    timings = []
+    statements = 0
+    errors = 0
+    for i in range(warmup, warmup + iterations):
+        args = prepare(i)
+        counter.count = 0
+        start = time.perf_counter()
+        response = call(args)
+        timings.append(time.perf_counter() - start)
+        statements += counter.count
+        if response.status_code >= 400:
+            errors += 1
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'ops_per_sec': round(iterations / sum(timings), 2),
+        'mean_ms': round(sum(timings) / iterations * 1000, 3),
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'queries_per_op': round(statements / iterations, 2),
+        'errors': errors
+    }
+
+
+def run_size(args):
+    """Child process: seed one directory size and run the selected benchmarks."""
+    from app import create_app, db, seed as seeding
+
+    app = create_app()
+    seeding.seed(app, sample_users=False)
+    started = time.perf_counter()
+    with app.app_context():
+        populate(args.size, args.seed)
+        counter = StatementCounter()
+        counter.attach(db.engines.values())
+    populate_seconds = time.perf_counter() - started
+    print(f'{args.size} users seeded in {populate_seconds:.1f}s', file=sys.stderr)
+
+    ctx = Context(app, app.test_client(), args.seed, args.batch)
+    selected = benchmarks(ctx)
+    results = {}
+    for name in BENCHMARK_ORDER:
+        if args.only and name not in args.only:
+            continue
+        prepare, call = selected[name]
+        iterations = args.write_iterations if name in WRITE_BENCHMARKS else args.iterations
+        results[name] = measure(prepare, call, iterations, args.warmup, counter)
+        print(f'  {name}: {results[name]["ops_per_sec"]} ops/s, p50 {results[name]["p50_ms"]} ms, '
+              f'p99 {results[name]["p99_ms"]} ms, {results[name]["queries_per_op"]} queries/op', file=sys.stderr)
+    return {'populate_seconds': round(populate_seconds, 2), 'benchmarks': results}
+
+
+def _git(*command):
+    try:
+        return subprocess.run(['git', *command], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(args):
+    from importlib.metadata import version
+    try:
+        import orjson  # noqa: F401
+        has_orjson = True
+    except ImportError:
+        has_orjson = False
+    return {
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'flask': version('flask'),
+        'sqlalchemy': version('sqlalchemy'),
+        'orjson': has_orjson,
+        'cache': not args.no_cache,
+        'iterations': args.iterations,
+        'write_iterations': args.write_iterations,
+        'batch': args.batch,
+        'seed': args.seed
+    }
+
+
+def child_env(database_path, no_cache):
+    env = dict(os.environ)
+    env.update({
+        'FLASK_ENV': 'production',
+        'DATABASE_URL': f'sqlite:///{database_path}',
+        'MAIL_SUPPRESS_SEND': 'True',
+        'MAIL_WORKER_IN_PROCESS': 'False',
+        # Keep the Google key prefetch off the network
+        'GOOGLE_CLIENT_ID': ''
+    })
+    if no_cache:
+        env.update({'RESPONSE_CACHE_SIZE': '0', 'USER_JSON_CACHE_SIZE': '0'})
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated directory sizes')
+    parser.add_argument('--iterations', type=int, default=200, help='timed requests per read benchmark')
+    parser.add_argument('--write-iterations', type=int, default=50, help='timed requests per write benchmark')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--batch', type=int, default=100, help='users per import/delete request')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', type=lambda value: [name for name in value.split(',') if name],
+                        help=f'comma-separated subset of: {", ".join(BENCHMARK_ORDER)}')
+    parser.add_argument('--no-cache', action='store_true', help='disable the response and per-user JSON caches')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--child-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.only:
+        unknown = set(args.only) - set(BENCHMARK_ORDER)
+        if unknown:
+            parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+
+    if args.child_output:
+        with open(args.child_output, 'w') as f:
+            json.dump(run_size(args), f)
+        return
+
+    report = {'meta': metadata(args), 'results': {}}
+    for size in [int(size) for size in args.sizes.split(',') if size]:
+        print(f'Benchmarking {size} users...', file=sys.stderr)
+        with tempfile.TemporaryDirectory() as workdir:
+            output = os.path.join(workdir, 'results.json')
+            command = [sys.executable, '-m', 'benchmarks.run', '--size', str(size), '--child-output', output,
+                       '--iterations', str(args.iterations), '--write-iterations', str(args.write_iterations),
+                       '--warmup', str(args.warmup), '--batch', str(args.batch), '--seed', str(args.seed)]
+            if args.only:
+                command += ['--only', ','.join(args.only)]
+            subprocess.run(command, cwd=BACKEND_DIR, env=child_env(os.path.join(workdir, 'bench.db'), args.no_cache),
+                           stdout=subprocess.DEVNULL, check=True)
+            with open(output) as f:
+                report['results'][str(size)] = json.load(f)
+
+    path = args.output or os.path.join(RESULTS_DIR, f'{report["meta"]["commit"] or "results"}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f'Results written to {path}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
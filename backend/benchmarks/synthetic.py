@@ -0,0 +1,123 @@
+"""Synthetic user directories shaped like sample_users.csv and the seed data.
+
+Users belong to a team, carry 3-5 tags drawn mostly from their team's
+skills (popular skills more often), sometimes a cross-team tag and now
+and then a long-tail variant, and are available on 1-3 days, mostly
+weekdays with Friday the busiest. Output is deterministic for a seed.
+
+    python -m benchmarks.synthetic 10000 users.csv   # CSV for scripts/import_users.py
+"""
+import csv
+import json
+import random
+import sys
+
+# team -> (relative size, job titles, skills in popularity order)
+TEAMS = {
+    'DevOps': (8, ['Cloud Infrastructure Engineer', 'Site Reliability Engineer', 'Platform Engineer'],
+               ['docker', 'kubernetes', 'terraform', 'aws', 'linux', 'azure', 'gcp', 'ansible', 'jenkins', 'automation']),
+    'Backend': (7, ['Backend Developer', 'API Engineer', 'Systems Architect'],
+                ['python', 'node.js', 'postgresql', 'django', 'go', 'mongodb', 'redis', 'java', 'graphql', 'kafka']),
+    'Frontend': (6, ['Frontend Developer', 'UI Engineer', 'Web Developer'],
+                 ['react', 'javascript', 'typescript', 'css', 'accessibility', 'vue', 'next.js', 'webpack', 'svelte']),
+    'Full Stack': (5, ['Full Stack Developer', 'Software Engineer'],
+                   ['react', 'node.js', 'python', 'postgresql', 'typescript', 'docker', 'aws', 'graphql']),
+    'Data Science': (5, ['Machine Learning Researcher', 'Data Scientist', 'Analytics Engineer'],
+                     ['python', 'machine-learning', 'pytorch', 'deep-learning', 'nlp', 'pandas', 'sql', 'tensorflow', 'spark']),
+    'Design': (4, ['Product Designer', 'UX Researcher', 'Visual Designer'],
+               ['figma', 'ui', 'ux', 'accessibility', 'design-systems', 'sketch', 'prototyping', 'illustration']),
+    'Security': (3, ['Cybersecurity Analyst', 'Penetration Tester', 'Security Engineer'],
+                 ['security', 'python', 'incident-response', 'linux', 'pentesting', 'ethical-hacking', 'burpsuite', 'nmap']),
+    'Mobile': (3, ['Mobile Developer', 'iOS Engineer', 'Android Engineer'],
+               ['flutter', 'swift', 'kotlin', 'react-native', 'dart', 'firebase', 'mobile']),
+    'QA': (2, ['QA Engineer', 'Test Automation Engineer'],
+           ['automation', 'selenium', 'cypress', 'jenkins', 'python', 'performance']),
+    'Gaming': (2, ['Game Developer', 'Graphics Programmer'],
+               ['unity', 'c#', 'unreal', 'c++', 'optimization', 'shaders']),
+    'AI': (2, ['AI Engineer', 'Computer Vision Engineer'],
+           ['machine-learning', 'python', 'tensorflow', 'opencv', 'transformers', 'huggingface'])
+}
+
+# Tags anyone may carry, regardless of team
+COMMON_TAGS = ['remote', 'mentoring', 'open-source', 'flexible', 'weekend-warrior', 'night-shift']
+
+FIRST_NAMES = [
+    'Alina', 'Ryan', 'Meera', 'Leo', 'Sarah', 'Omar', 'Priya', 'Jonas', 'Chen', 'Fatima', 'Lucas', 'Ana',
+    'Kofi', 'Hana', 'Mateo', 'Ingrid', 'Ravi', 'Zoe', 'Yusuf', 'Elena', 'Tomas', 'Aiko', 'Noah', 'Lena'
+]
+LAST_NAMES = [
+    'Morris', 'Delgado', 'Iyer', 'Varga', 'Kim', 'Haddad', 'Nair', 'Berg', 'Wang', 'Okafor', 'Silva', 'Rossi',
+    'Mensah', 'Sato', 'Garcia', 'Larsen', 'Patel', 'Novak', 'Demir', 'Popescu', 'Costa', 'Tanaka', 'Weber', 'Cruz'
+]
+
+# Matches the spread of the seed data: mostly weekdays, Friday busiest, weekends rare
+DAY_WEIGHTS = {'monday': 11, 'tuesday': 11, 'wednesday': 13, 'thursday': 12, 'friday': 16, 'saturday': 4, 'sunday': 1}
+TAG_COUNT_WEIGHTS = {3: 5, 4: 25, 5: 4}
+DAY_COUNT_WEIGHTS = {1: 2, 2: 31, 3: 1}
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _sample_without_replacement(rng, items, weights, count):
+    items, weights = list(items), list(weights)
+    chosen = []
+    while items and len(chosen) < count:
+        index = rng.choices(range(len(items)), weights=weights)[0]
+        chosen.append(items.pop(index))
+        weights.pop(index)
+    return chosen
+
+
+def generate_users(count, seed=0, start=0, domain='example.com'):
+    """Yield ``count`` import rows (the dicts POST /api/users/import accepts).
+
+    ``start`` offsets the running number in the emails, so batches made
+    with different starts never collide.
+    """
+    rng = random.Random(f'{seed}:{start}')
+    teams = {name: weight for name, (weight, _, _) in TEAMS.items()}
+    for number in range(start, start + count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        team = _weighted(rng, teams)
+        _, titles, skills = TEAMS[team]
+
+        # Skill popularity falls off with rank, like the tag counts in the seed data
+        tag_count = _weighted(rng, TAG_COUNT_WEIGHTS)
+        tags = _sample_without_replacement(rng, skills, [1 / (rank + 1) for rank in range(len(skills))], tag_count)
+        if rng.random() < 0.2:
+            tags[-1] = rng.choice(COMMON_TAGS)
+        if rng.random() < 0.05:
+            tags[-1] = f'{rng.choice(skills)}-{rng.randint(1, 500)}'
+
+        day_count = _weighted(rng, DAY_COUNT_WEIGHTS)
+        days = _sample_without_replacement(rng, DAY_WEIGHTS, DAY_WEIGHTS.values(), day_count)
+        handle = f'{first}{last}{number}'.lower()
+        yield {
+            'email': f'{first}.{last}.{number}@{domain}'.lower(),
+            'name': f'{first} {last}',
+            'description': rng.choice(titles),
+            'tags': list(dict.fromkeys(tags)),
+            'team': team,
+            'available_days': sorted(days, key=list(DAY_WEIGHTS).index),
+            'links': {'github': f'https://github.com/{handle}', 'linkedin': f'https://linkedin.com/in/{handle}'}
+        }
+
+
+def write_csv(path, count, seed=0):
+    """Write ``count`` users in the import_users.py CSV format."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['email', 'name', 'description', 'tags', 'team', 'available_days', 'links'])
+        for user in generate_users(count, seed):
+            writer.writerow([
+                user['email'], user['name'], user['description'], ';'.join(user['tags']),
+                user['team'], ';'.join(user['available_days']), json.dumps(user['links'])
+            ])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python -m benchmarks.synthetic COUNT OUTPUT.csv')
+    write_csv(sys.argv[2], int(sys.argv[1]))
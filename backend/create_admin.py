@@ -1,4 +1,4 @@
-from app import create_app, db
+from app import create_app, db, facets, versions
 from app.models.user import User
 import uuid
 
@@ -21,11 +21,13 @@ def create_admin_user():
             tags=['admin'],
             links={},
             team='Admin',
-            available_days=['Mo', 'Tu', 'We', 'Th', 'Fr']
+            available_days=['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
         )
 
         # Add to database
         db.session.add(admin)
+        facets.adjust_tag_counts(added=[admin.tags])
+        versions.bump(versions.USERS, versions.TAGS)
         db.session.commit()
         print("Admin user created successfully!")
 
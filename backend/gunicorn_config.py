@@ -1,4 +1,7 @@
+import glob
 import multiprocessing
+import os
+import tempfile
 
 # Gunicorn configuration
 bind = "0.0.0.0:5000"
@@ -10,4 +13,43 @@ max_requests = 1000
 max_requests_jitter = 50
 accesslog = "gunicorn_access.log"
 errorlog = "gunicorn_error.log"
-loglevel = "info" 
\ No newline at end of file
+loglevel = "info"
+
+# Workers write Prometheus samples here so /metrics can sum them (see app/metrics.py).
+# Set before the workers import the app; must be private to this server.
+default_multiproc_dir = os.path.join(tempfile.gettempdir(), f"community-board-metrics-{os.getpid()}")
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", default_multiproc_dir)
+
+
+def _remove_samples(path):
+    # Only the sample files: the directory may be one the operator shares with other things
+    for sample in glob.glob(os.path.join(path, "*.db")):
+        try:
+            os.remove(sample)
+        except FileNotFoundError:
+            pass
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to this one's
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(path, exist_ok=True)
+    _remove_samples(path)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    _remove_samples(path)
+    if path == default_multiproc_dir:
+        try:
+            os.rmdir(path)
+        except OSError:
+            pass
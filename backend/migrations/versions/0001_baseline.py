@@ -0,0 +1,43 @@
+"""baseline user table
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by db.create_all() before migrations existed already
+    # have this table; adopt it as-is.
+    if sa.inspect(op.get_bind()).has_table('user'):
+        return
+
+    op.create_table('user',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('links', sa.JSON(), nullable=True),
+        sa.Column('team', sa.String(length=120), nullable=True),
+        sa.Column('available_days', sa.JSON(), nullable=True),
+        sa.Column('avatar_url', sa.String(length=500), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+    )
+
+
+def downgrade():
+    op.drop_table('user')
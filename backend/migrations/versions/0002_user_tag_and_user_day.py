@@ -0,0 +1,115 @@
+"""move tags and available days into junction tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.models.user_day so the migration does not change with the app
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+DAY_BITS = {day: 1 << index for index, day in enumerate(DAYS)}
+DAY_ALIASES = {day[:length]: day for day in DAYS for length in (2, 3)}
+DAY_ALIASES.update({'tues': 'tuesday', 'weds': 'wednesday', 'thur': 'thursday', 'thurs': 'thursday'})
+
+legacy_user = sa.table('user',
+    sa.column('id', sa.String),
+    sa.column('tags', sa.JSON),
+    sa.column('available_days', sa.JSON)
+)
+user_tag = sa.table('user_tag',
+    sa.column('user_id', sa.String),
+    sa.column('tag', sa.String),
+    sa.column('position', sa.Integer)
+)
+user_day = sa.table('user_day',
+    sa.column('user_id', sa.String),
+    sa.column('day_bitmask', sa.Integer)
+)
+
+
+def _day_bit(value):
+    value = str(value).strip().lower()
+    day = value if value in DAY_BITS else DAY_ALIASES.get(value)
+    return DAY_BITS[day] if day else None
+
+
+def upgrade():
+    op.create_table('user_tag',
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('tag', sa.String(length=120), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'tag')
+    )
+    op.create_index('ix_user_tag_tag_user_id', 'user_tag', ['tag', 'user_id'])
+
+    op.create_table('user_day',
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('day_bitmask', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'day_bitmask')
+    )
+    op.create_index('ix_user_day_day_bitmask_user_id', 'user_day', ['day_bitmask', 'user_id'])
+
+    # Copy the JSON lists into the junction tables, normalizing day spellings
+    bind = op.get_bind()
+    tag_rows = []
+    day_rows = []
+    for user_id, tags, days in bind.execute(
+        sa.select(legacy_user.c.id, legacy_user.c.tags, legacy_user.c.available_days)
+    ):
+        seen = []
+        for tag in tags or []:
+            tag = str(tag).strip()
+            if tag and tag not in seen:
+                tag_rows.append({'user_id': user_id, 'tag': tag, 'position': len(seen)})
+                seen.append(tag)
+        bits = {_day_bit(day) for day in days or []} - {None}
+        day_rows.extend({'user_id': user_id, 'day_bitmask': bit} for bit in sorted(bits))
+    if tag_rows:
+        op.bulk_insert(user_tag, tag_rows)
+    if day_rows:
+        op.bulk_insert(user_day, day_rows)
+
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('tags')
+        batch_op.drop_column('available_days')
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('tags', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('available_days', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    tags = {}
+    for user_id, tag in bind.execute(
+        sa.select(user_tag.c.user_id, user_tag.c.tag).order_by(user_tag.c.user_id, user_tag.c.position)
+    ):
+        tags.setdefault(user_id, []).append(tag)
+    days = {}
+    for user_id, bit in bind.execute(
+        sa.select(user_day.c.user_id, user_day.c.day_bitmask).order_by(user_day.c.user_id, user_day.c.day_bitmask)
+    ):
+        days.setdefault(user_id, []).append(DAYS[bit.bit_length() - 1])
+    for user_id in set(tags) | set(days):
+        bind.execute(
+            legacy_user.update()
+            .where(legacy_user.c.id == user_id)
+            .values(tags=tags.get(user_id, []), available_days=days.get(user_id, []))
+        )
+
+    op.drop_index('ix_user_day_day_bitmask_user_id', table_name='user_day')
+    op.drop_table('user_day')
+    op.drop_index('ix_user_tag_tag_user_id', table_name='user_tag')
+    op.drop_table('user_tag')
@@ -0,0 +1,32 @@
+"""add tag facet counts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tag_facet',
+        sa.Column('tag', sa.String(length=120), nullable=False),
+        sa.Column('user_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('tag')
+    )
+    op.execute(
+        'INSERT INTO tag_facet (tag, user_count) '
+        'SELECT tag, COUNT(user_id) FROM user_tag GROUP BY tag'
+    )
+
+
+def downgrade():
+    op.drop_table('tag_facet')
@@ -1,4 +1,4 @@
-from app import create_app, db
+from app import create_app, db, facets, versions
 from app.models.user import User
 import uuid
 
@@ -42,17 +42,21 @@ def add_saturday_users():
             }
         ]
 
+        added_tags = []
         for user_data in saturday_users:
             # Check if user already exists
             existing_user = User.query.filter_by(email=user_data['email']).first()
             if not existing_user:
                 user = User(**user_data)
                 db.session.add(user)
+                added_tags.append(user_data['tags'])
                 print(f"Adding user: {user_data['name']}")
             else:
                 print(f"User already exists: {user_data['name']}")
 
         try:
+            facets.adjust_tag_counts(added=added_tags)
+            versions.bump(versions.USERS, versions.TAGS)
             db.session.commit()
             print("Successfully added Saturday users!")
         except Exception as e:
@@ -1,8 +1,13 @@
+import argparse
 import csv
+import json
+import os
 import sys
-import uuid
-from app import create_app, db
-from app.models import User
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from app import create_app, db, importer
+from app.models.user_day import normalize_day
 
 def validate_email(email):
     """Basic email validation"""
@@ -18,101 +23,225 @@ def process_available_days(days_str):
     """Process available days from CSV string"""
     if not days_str:
         return []
-    valid_days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-    days = [day.strip().lower() for day in days_str.split(';') if day.strip()]
-    return [day for day in days if day in valid_days]
+    days = [normalize_day(day) for day in days_str.split(';') if day.strip()]
+    return [day for day in days if day]
 
-def import_users_from_csv(file_path):
+def process_links(links_str, overflow):
+    """Process the JSON links column.
+
+    Spreadsheet exports (see sample_users.csv) split the JSON object at its
+    commas into extra unnamed columns, so keep appending those until the
+    text parses.
+    """
+    text = (links_str or '').strip()
+    if not text:
+        return {}
+    parts = list(overflow)
+    while True:
+        try:
+            links = json.loads(text)
+            return links if isinstance(links, dict) else {}
+        except ValueError:
+            if not parts:
+                return {}
+            text = f'{text},{parts.pop(0)}'
+
+def read_records(csvfile):
+    """Yield ``(record_text, end_offset)`` for each CSV record in a binary file.
+
+    A record may span several physical lines when a quoted field contains a
+    newline; lines are joined until the quotes balance. ``end_offset`` is the
+    byte offset just past the record, which is where a resumed import starts.
+    """
+    record = b''
+    while True:
+        line = csvfile.readline()
+        if not line:
+            if record.strip():
+                yield record.decode('utf-8'), csvfile.tell()
+            return
+        record += line
+        if record.count(b'"') % 2 == 0:
+            if record.strip():
+                yield record.decode('utf-8'), csvfile.tell()
+            record = b''
+
+def parse_batch(headers, records, first_row_num):
+    """Parse and validate a batch of CSV records. Runs in a worker process.
+
+    Returns ``(rows, errors)`` where rows are ``(row_num, mapping)`` pairs
+    ready for importer.insert_users() and errors are ``(row_num, message)``.
+    """
+    rows = []
+    errors = []
+    for row_num, fields in enumerate(csv.reader(records), start=first_row_num):
+        row = {}
+        overflow = []
+        for index, value in enumerate(fields):
+            header = headers[index] if index < len(headers) else ''
+            if header:
+                row[header] = value
+            elif value.strip():
+                overflow.append(value)
+
+        email = (row.get('email') or '').strip()
+        if not email or not (row.get('name') or '').strip():
+            errors.append((row_num, f"Row {row_num}: Email and name are required"))
+            continue
+        if not validate_email(email):
+            errors.append((row_num, f"Row {row_num}: Invalid email format - {email}"))
+            continue
+
+        mapping, error = importer.prepare_row({
+            'email': email,
+            'name': row.get('name'),
+            'description': row.get('description', ''),
+            'tags': process_tags(row.get('tags', '')),
+            'team': row.get('team', ''),
+            'available_days': process_available_days(row.get('available_days', '')),
+            'links': process_links(row.get('links', ''), overflow)
+        }, row_num)
+        if error:
+            errors.append((row_num, error))
+        else:
+            rows.append((row_num, mapping))
+    return rows, errors
+
+def load_checkpoint(path, file_path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint.get('file') != os.path.abspath(file_path):
+        print(f"Error: Checkpoint {path} belongs to {checkpoint.get('file')}")
+        sys.exit(1)
+    return checkpoint
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically so a crash never leaves it half-written."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(tmp_path, path)
+
+def batches(csvfile, batch_size, first_row_num):
+    """Group records into ``(records, first_row_num, end_offset)`` batches."""
+    records = []
+    row_num = first_row_num
+    for record, end_offset in read_records(csvfile):
+        records.append(record)
+        if len(records) >= batch_size:
+            yield records, row_num, end_offset
+            row_num += len(records)
+            records = []
+    if records:
+        yield records, row_num, csvfile.tell()
+
+def import_users_from_csv(file_path, batch_size=5000, workers=None, checkpoint_path=None, restart=False):
+    """Stream a CSV file into the database.
+
+    Records are parsed and validated in a process pool while this process
+    is the single writer, committing one transaction per batch. After each
+    commit the byte offset and row number are saved to a checkpoint file so
+    an interrupted import resumes where it stopped.
+    """
     app = create_app()
-    
+    checkpoint_path = checkpoint_path or f'{file_path}.checkpoint.json'
+
     with app.app_context():
-        success_count = 0
-        error_count = 0
-        errors = []
-        
         try:
-            with open(file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                
+            with open(file_path, 'rb') as csvfile:
+                checkpoint = None if restart else load_checkpoint(checkpoint_path, file_path)
+
                 # Validate headers
+                header_record, header_end = next(read_records(csvfile), ('', 0))
+                headers = [header.strip() for header in next(csv.reader([header_record]), [])]
                 required_headers = {'email', 'name'}
-                headers = set(reader.fieldnames)
                 if not required_headers.issubset(headers):
                     print(f"Error: Missing required headers. Required: {required_headers}")
                     return
-                
-                # Process each row
-                for row_num, row in enumerate(reader, start=2):  # start=2 because row 1 is headers
-                    try:
-                        # Validate required fields
-                        if not row['email'] or not row['name']:
-                            errors.append(f"Row {row_num}: Email and name are required")
-                            error_count += 1
-                            continue
-                            
-                        # Validate email format
-                        if not validate_email(row['email']):
-                            errors.append(f"Row {row_num}: Invalid email format - {row['email']}")
-                            error_count += 1
-                            continue
-                        
-                        # Check if user already exists
-                        if User.query.filter_by(email=row['email']).first():
-                            errors.append(f"Row {row_num}: User with email {row['email']} already exists")
-                            error_count += 1
-                            continue
-                        
-                        # Create new user
-                        user = User(
-                            id=str(uuid.uuid4()),
-                            email=row['email'],
-                            name=row['name'],
-                            description=row.get('description', ''),
-                            tags=process_tags(row.get('tags', '')),
-                            team=row.get('team', ''),
-                            available_days=process_available_days(row.get('available_days', '')),
-                            is_active=True
-                        )
-                        
-                        db.session.add(user)
-                        success_count += 1
-                        
-                        # Commit every 100 users to avoid memory issues
-                        if success_count % 100 == 0:
+
+                if checkpoint:
+                    csvfile.seek(checkpoint['offset'])
+                    print(f"Resuming at row {checkpoint['row_num']} (byte {checkpoint['offset']})")
+                else:
+                    checkpoint = {
+                        'file': os.path.abspath(file_path),
+                        'offset': header_end,
+                        'row_num': 2,  # row 1 is headers
+                        'success_count': 0,
+                        'error_count': 0
+                    }
+
+                started = time.monotonic()
+                processed = 0
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    # Keep a bounded number of batches in flight so memory stays flat
+                    in_flight = deque()
+                    pending = batches(csvfile, batch_size, checkpoint['row_num'])
+                    max_in_flight = (workers or os.cpu_count() or 1) * 2
+
+                    while True:
+                        while len(in_flight) < max_in_flight:
+                            batch = next(pending, None)
+                            if batch is None:
+                                break
+                            records, first_row_num, end_offset = batch
+                            future = pool.submit(parse_batch, headers, records, first_row_num)
+                            in_flight.append((future, first_row_num + len(records), end_offset))
+                        if not in_flight:
+                            break
+
+                        future, next_row_num, end_offset = in_flight.popleft()
+                        rows, errors = future.result()
+                        try:
+                            inserted, insert_errors = importer.insert_users(rows)
                             db.session.commit()
-                            print(f"Processed {success_count} users...")
-                    
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: Error processing row - {str(e)}")
-                        error_count += 1
-                        continue
-                
-                # Final commit for remaining users
-                try:
-                    db.session.commit()
-                except Exception as e:
-                    db.session.rollback()
-                    print(f"Error committing to database: {str(e)}")
-                    return
-                
+                        except Exception as e:
+                            db.session.rollback()
+                            print(f"Error committing to database: {str(e)}")
+                            print(f"Resume with the same command to continue from row {checkpoint['row_num']}")
+                            return
+
+                        errors = sorted(errors + insert_errors)
+                        for _, error in errors:
+                            print(f"- {error}")
+
+                        processed += next_row_num - checkpoint['row_num']
+                        checkpoint.update({
+                            'offset': end_offset,
+                            'row_num': next_row_num,
+                            'success_count': checkpoint['success_count'] + len(inserted),
+                            'error_count': checkpoint['error_count'] + len(errors)
+                        })
+                        save_checkpoint(checkpoint_path, checkpoint)
+
+                        elapsed = time.monotonic() - started
+                        print(f"Processed {processed} rows ({processed / elapsed:.0f} rows/sec), "
+                              f"{checkpoint['success_count']} users imported...")
+
+                # The import finished, so there is nothing left to resume
+                if os.path.exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+
                 # Print summary
                 print("\nImport Summary:")
-                print(f"Successfully imported: {success_count} users")
-                print(f"Errors encountered: {error_count}")
-                
-                if errors:
-                    print("\nErrors:")
-                    for error in errors:
-                        print(f"- {error}")
+                print(f"Successfully imported: {checkpoint['success_count']} users")
+                print(f"Errors encountered: {checkpoint['error_count']}")
         except FileNotFoundError:
             print(f"Error: File not found - {file_path}")
         except Exception as e:
             print(f"Error: Failed to process CSV file - {str(e)}")
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python import_users.py <path_to_csv_file>")
-        sys.exit(1)
-    
-    csv_file = sys.argv[1]
-    import_users_from_csv(csv_file) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Import users from a CSV file.')
+    parser.add_argument('csv_file', help='path to the CSV file')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows per transaction (default: 5000)')
+    parser.add_argument('--workers', type=int, default=None, help='parser processes (default: CPU count)')
+    parser.add_argument('--checkpoint', default=None, help='checkpoint file (default: <csv_file>.checkpoint.json)')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint and start over')
+    args = parser.parse_args()
+
+    import_users_from_csv(args.csv_file, args.batch_size, args.workers, args.checkpoint, args.restart)
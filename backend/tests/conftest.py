@@ -0,0 +1,49 @@
+import pytest
+from app import auth, create_app, db, serialization, versions
+from app import seed as seeding
+
+pytest_plugins = ['app.pytest_plugin']
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build a migrated app on a fresh SQLite file; extra settings override the testing config."""
+    apps = []
+
+    def factory(**settings):
+        settings.setdefault('SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / f"test{len(apps)}.db"}')
+        settings.setdefault('GOOGLE_CLIENT_ID', None)
+        app = create_app('testing', settings)
+        seeding.seed(app, sample_users=settings.pop('SAMPLE_USERS', False))
+        apps.append(app)
+        return app
+
+    # Per-process caches would otherwise carry state between test databases
+    serialization.user_json.clear()
+    versions.snapshot.invalidate()
+    auth.principals.clear()
+    yield factory
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(SAMPLE_USERS=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(app):
+    from app.models import User
+    from app.routes import generate_token
+    with app.app_context():
+        admin = User.query.filter_by(email='admin@example.com').one()
+        return {'Authorization': f'Bearer {generate_token(admin.id)}'}
@@ -0,0 +1,33 @@
+import time
+from app import auth
+from app.models import User
+from app.routes import generate_token
+
+
+def _tokens(app):
+    with app.app_context():
+        admin = User.query.filter_by(email='admin@example.com').one()
+        member = User.query.filter(User.is_admin.is_(False)).first()
+        return generate_token(admin.id), generate_token(member.id)
+
+
+def test_cache_miss_is_one_query(app, query_counter):
+    admin_token, _ = _tokens(app)
+    with app.app_context():
+        with query_counter() as log:
+            principal = auth.authenticate(admin_token)
+        assert log.count == 1, log.report()
+        assert principal.is_admin and principal.is_active
+        with query_counter() as log:
+            assert auth.authenticate(admin_token) == principal
+        assert log.count == 0
+
+
+def test_admin_principals_expire_sooner(app):
+    admin_token, member_token = _tokens(app)
+    with app.app_context():
+        auth.authenticate(admin_token)
+        auth.authenticate(member_token)
+    expires = {principal.is_admin: expires_at - time.time() for principal, expires_at in auth.principals._entries.values()}
+    assert expires[True] <= app.config['AUTH_CACHE_ADMIN_TTL']
+    assert expires[False] > app.config['AUTH_CACHE_ADMIN_TTL']
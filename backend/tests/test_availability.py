@@ -0,0 +1,38 @@
+import uuid
+from app import db
+from app.models import User
+
+
+def _emails(response):
+    assert response.status_code == 200, response.get_json()
+    return {user['email'] for user in response.get_json()}
+
+
+def _add(app, email, days):
+    with app.app_context():
+        db.session.add(User(id=str(uuid.uuid4()), email=email, name=email, available_days=days))
+        db.session.commit()
+
+
+def test_filters_by_all_and_any_days(make_app):
+    app = make_app()
+    _add(app, 'weekend@example.com', ['saturday', 'sunday'])
+    _add(app, 'friday@example.com', ['friday', 'saturday'])
+    _add(app, 'none@example.com', [])
+    client = app.test_client()
+
+    assert _emails(client.get('/api/availability?all=sat,sun')) == {'weekend@example.com'}
+    assert _emails(client.get('/api/availability?any=fri,sun')) == {'weekend@example.com', 'friday@example.com'}
+    assert _emails(client.get('/api/availability?all=sat&any=fri,mo')) == {'friday@example.com'}
+    assert _emails(client.get('/api/users?days=saturday')) == {'weekend@example.com', 'friday@example.com'}
+
+
+def test_day_filters_use_the_user_day_index(make_app):
+    app = make_app()
+    with app.app_context():
+        query = User.filter_by_days(db.select(User.id), 0b1100001, match='all')
+        query = User.filter_by_days(query, 0b0010000, match='any')
+        plan = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {query.compile(compile_kwargs={"literal_binds": True})}')).all()
+    details = [row[-1] for row in plan]
+    assert not any('SCAN user_day' in detail for detail in details), details
+    assert sum('ix_user_day_day_bitmask_user_id (day_bitmask' in detail for detail in details) == 4, details
@@ -0,0 +1,47 @@
+from app import db
+from app.models import User
+from app.routes import generate_token
+
+
+def _members(app, count):
+    with app.app_context():
+        users = User.query.filter(User.is_admin.is_(False), User.is_active.is_(True)).order_by(User.id).limit(count).all()
+        return [(user.id, generate_token(user.id)) for user in users]
+
+
+def test_soft_delete_deactivates_and_locks_out(app, client, admin_headers):
+    (kept_id, kept_token), (gone_id, gone_token) = _members(app, 2)
+    with app.app_context():
+        tags = db.session.get(User, gone_id).tags
+    # Warm the auth cache, so the soft delete must evict it
+    assert client.get('/api/auth/verify', headers={'Authorization': f'Bearer {gone_token}'}).status_code == 200
+
+    response = client.post('/api/users/delete', json={'userIds': [gone_id, 'missing-id'], 'soft': True},
+                           headers=admin_headers)
+    assert response.status_code == 207
+    assert response.get_json() == {'deleted': 1, 'errors': ['User not found: missing-id'], 'soft': True}
+
+    with app.app_context():
+        user = db.session.get(User, gone_id)
+        assert user is not None and user.is_active is False
+        assert user.tags == tags
+        assert db.session.get(User, kept_id).is_active is True
+
+    gone = {'Authorization': f'Bearer {gone_token}'}
+    assert client.get('/api/auth/verify', headers=gone).status_code == 403
+    assert client.patch(f'/api/users/{gone_id}', json={'name': 'Back'},
+                        headers={**gone, 'If-Match': '*'}).status_code == 403
+    assert client.get('/api/auth/verify', headers={'Authorization': f'Bearer {kept_token}'}).status_code == 200
+
+    # Still listed, flagged inactive
+    assert client.get(f'/api/users/{gone_id}').get_json()['isActive'] is False
+
+
+def test_hard_delete_removes_rows(app, client, admin_headers):
+    [(user_id, token)] = _members(app, 1)
+    response = client.post('/api/users/delete', json={'userIds': [user_id]}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['deleted'] == 1
+    with app.app_context():
+        assert db.session.get(User, user_id) is None
+    assert client.get('/api/auth/verify', headers={'Authorization': f'Bearer {token}'}).status_code == 404
@@ -0,0 +1,175 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from app.google_tokens import SigningKeyCache, signing_keys, verify_id_token
+
+CLIENT_ID = 'client-id.apps.googleusercontent.com'
+
+
+def _private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+class JWKSServer(ThreadingHTTPServer):
+    """Stand-in for Google's certs endpoint: serves ``keys`` and counts requests."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), JWKSHandler)
+        self.keys = {}
+        self.status = 200
+        self.delay = 0
+        self.max_age = 3600
+        self.hits = 0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/certs'
+
+    def add_key(self, kid):
+        key = _private_key()
+        jwk = json.loads(RSAAlgorithm.to_jwk(key.public_key()))
+        self.keys[kid] = dict(jwk, kid=kid, use='sig', alg='RS256')
+        return key
+
+
+class JWKSHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        body = json.dumps({'keys': list(self.server.keys.values())}).encode()
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Cache-Control', f'public, max-age={self.server.max_age}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = JWKSServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(server):
+    return SigningKeyCache(server.url, timeout=2, min_refresh_interval=30)
+
+
+def _token(key, kid, **claims):
+    claims = {'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'email': 'user@example.com',
+              'exp': int(time.time()) + 300, **claims}
+    return jwt.encode(claims, key, algorithm='RS256', headers={'kid': kid})
+
+
+def _wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_fetches_once_and_caches(server, cache):
+    server.add_key('k1')
+    assert cache.get('k1') is not None
+    assert cache.get('k1') is not None
+    assert server.hits == 1
+
+
+def test_verify_id_token(server, cache, monkeypatch):
+    key = server.add_key('k1')
+    cache.configure(server.url)
+    monkeypatch.setattr('app.google_tokens.signing_keys', cache)
+    assert verify_id_token(_token(key, 'k1'), CLIENT_ID)['email'] == 'user@example.com'
+    with pytest.raises(ValueError):
+        verify_id_token(_token(key, 'k1', aud='someone-else'), CLIENT_ID)
+    with pytest.raises(ValueError):
+        verify_id_token(_token(key, 'k1', iss='https://evil.example.com'), CLIENT_ID)
+
+
+def test_serves_expired_keys_while_refreshing(server, cache):
+    server.add_key('k1')
+    cache.get('k1')
+    cache._expires_at = time.time() - 1
+    server.delay = 0.5
+
+    started = time.monotonic()
+    assert cache.get('k1') is not None
+    assert time.monotonic() - started < 0.25
+    _wait_for(lambda: server.hits == 2)
+    _wait_for(lambda: cache._expires_at > time.time())
+
+
+def test_keeps_serving_when_refresh_fails(server, cache):
+    server.add_key('k1')
+    cache.get('k1')
+    cache._expires_at = time.time() - 1
+    server.status = 500
+
+    assert cache.get('k1') is not None
+    _wait_for(lambda: not cache._refreshing and server.hits == 2)
+    # A failed refresh is not retried on every call
+    assert cache.get('k1') is not None
+    assert server.hits == 2
+
+
+def test_one_fetch_for_concurrent_cold_callers(server, cache):
+    server.add_key('k1')
+    server.delay = 0.2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k1'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 8 and all(key is not None for key in results)
+    assert server.hits == 1
+
+
+def test_unknown_key_refreshes_once_per_interval(server, cache):
+    server.add_key('k1')
+    cache.get('k1')
+    cache._attempted_at -= 60
+    server.add_key('k2')
+    assert cache.get('k2') is not None
+    assert cache.get('k3') is None
+    assert server.hits == 2
+
+
+def test_fetch_errors_are_value_errors(server, cache):
+    server.status = 503
+    with pytest.raises(ValueError):
+        cache.get('k1')
+    # Fails fast within the interval instead of waiting on the server again
+    with pytest.raises(ValueError):
+        cache.get('k1')
+    assert server.hits == 1
+
+    unreachable = SigningKeyCache('http://127.0.0.1:9/certs', timeout=1)
+    with pytest.raises(ValueError):
+        unreachable.get('k1')
+
+
+def test_google_sign_in_is_401_when_keys_cannot_be_fetched(make_app, server):
+    server.status = 500
+    app = make_app(GOOGLE_CLIENT_ID=CLIENT_ID, GOOGLE_CERTS_URL=server.url)
+    try:
+        response = app.test_client().post('/api/auth/google', json={'credential': _token(_private_key(), 'k1')})
+        assert response.status_code == 401
+    finally:
+        _wait_for(lambda: not signing_keys._refreshing)
+        signing_keys.configure(signing_keys.url)
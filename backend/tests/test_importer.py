@@ -0,0 +1,28 @@
+import pytest
+from app.importer import prepare_row
+
+
+def _row(**fields):
+    return {'email': 'user@example.com', 'name': 'User', **fields}
+
+
+@pytest.mark.parametrize('value, expected', [
+    (True, True), (False, False), ('true', True), ('TRUE', True), ('1', True),
+    ('false', False), ('0', False), (' False ', False), ('', False), (None, False)
+])
+def test_is_admin_values(value, expected):
+    mapping, error = prepare_row(_row(is_admin=value), 1, allow_admin=True)
+    assert error is None
+    assert mapping['is_admin'] is expected
+
+
+@pytest.mark.parametrize('value', ['yes', 'no', 'off', 2, [], {}])
+def test_is_admin_rejects_other_values(value):
+    mapping, error = prepare_row(_row(is_admin=value), 3, allow_admin=True)
+    assert mapping is None
+    assert error == 'Row 3: is_admin must be true or false'
+
+
+def test_is_admin_needs_an_admin_importer():
+    mapping, _ = prepare_row(_row(is_admin='true'), 1, allow_admin=False)
+    assert mapping['is_admin'] is False
@@ -0,0 +1,102 @@
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from app import db, mailqueue
+from app.models import OutboxMessage
+
+
+class Inbox:
+    """aiosmtpd handler that keeps every message it accepts."""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith('refused'):
+            return '550 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append(envelope.rcpt_tos[:])
+        return '250 Message accepted'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    inbox = Inbox()
+    controller = Controller(inbox, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    yield inbox, controller.port
+    controller.stop()
+
+
+@pytest.fixture
+def sender(make_app, smtp_server):
+    inbox, port = smtp_server
+    app = make_app(MAIL_SUPPRESS_SEND=False, MAIL_SERVER='127.0.0.1', MAIL_PORT=port,
+                   MAIL_USE_TLS=False, MAIL_DEFAULT_SENDER='board@example.com', MAIL_POOL_SIZE=1)
+    sender = mailqueue.MailSender(app)
+    yield app, sender
+    sender.close()
+
+
+def _queue(app, *recipients):
+    with app.app_context():
+        for recipient in recipients:
+            mailqueue.enqueue('Hello', [recipient], '<p>Hello</p>')
+        db.session.commit()
+
+
+def _statuses(app):
+    with app.app_context():
+        return {message.recipients[0]: (message.status, message.last_error)
+                for message in OutboxMessage.query.all()}
+
+
+def test_failed_connect_fails_only_that_message(sender, smtp_server, monkeypatch):
+    app, sender = sender
+    inbox, _ = smtp_server
+    connect = mailqueue.SMTPConnectionPool._connect
+    calls = []
+
+    def flaky_connect(pool):
+        calls.append(pool)
+        if len(calls) == 1:
+            raise ConnectionRefusedError('connection refused')
+        return connect(pool)
+
+    monkeypatch.setattr(mailqueue.SMTPConnectionPool, '_connect', flaky_connect)
+    _queue(app, 'a@example.com', 'b@example.com', 'c@example.com', 'd@example.com')
+
+    with app.app_context():
+        assert sender.send_batch() == 4
+
+    statuses = _statuses(app)
+    sent = {recipient for recipient, (status, _) in statuses.items() if status == OutboxMessage.SENT}
+    pending = {recipient: error for recipient, (status, error) in statuses.items() if status == OutboxMessage.PENDING}
+    assert sorted(recipients[0] for recipients in inbox.received) == sorted(sent)
+    assert len(sent) == 3
+    assert len(pending) == 1
+    assert 'connection refused' in next(iter(pending.values()))
+
+
+def test_refused_recipient_keeps_connection_for_the_rest(sender, smtp_server):
+    app, sender = sender
+    inbox, _ = smtp_server
+    _queue(app, 'a@example.com', 'refused@example.com', 'c@example.com')
+
+    with app.app_context():
+        assert sender.send_batch() == 3
+
+    statuses = _statuses(app)
+    assert statuses['a@example.com'][0] == OutboxMessage.SENT
+    assert statuses['c@example.com'][0] == OutboxMessage.SENT
+    assert statuses['refused@example.com'][0] == OutboxMessage.PENDING
+    assert len(inbox.received) == 2
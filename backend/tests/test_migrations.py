@@ -0,0 +1,10 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from app import db, search
+
+
+def test_models_match_migrations(make_app):
+    app = make_app()
+    with app.app_context(), db.engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={'include_object': search.include_object})
+        assert compare_metadata(context, db.metadata) == []
@@ -0,0 +1,30 @@
+import pytest
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize('cursor', ['%%%', '!!!!', 'YQ==', 'a+b/', '-'])
+def test_malformed_cursor_is_400(client, cursor):
+    response = client.get('/api/users', query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert 'Invalid cursor' in response.get_json()['error']
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor('3f6c1c52-8a4e-4f0e-9b1a-2d7c5e0f9a11')) == '3f6c1c52-8a4e-4f0e-9b1a-2d7c5e0f9a11'
+
+
+def test_two_page_walk(client):
+    everyone = client.get('/api/users', query_string={'limit': 500}).get_json()
+    limit = len(everyone) // 2 + 1
+
+    first = client.get('/api/users', query_string={'limit': limit})
+    cursor = first.headers['X-Next-Cursor']
+    second = client.get('/api/users', query_string={'limit': limit, 'cursor': cursor})
+    assert second.status_code == 200
+    assert 'X-Next-Cursor' not in second.headers
+
+    ids = [user['id'] for user in first.get_json() + second.get_json()]
+    assert len(first.get_json()) == limit
+    assert ids == [user['id'] for user in everyone]
@@ -0,0 +1,48 @@
+import pytest
+from app import db
+from app.models import User
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        return db.session.execute(db.select(User.id).where(User.email != 'admin@example.com').limit(1)).scalar()
+
+
+def _patch(client, user_id, headers, if_match, **fields):
+    return client.patch(f'/api/users/{user_id}', json=fields or {'description': 'Patched'},
+                        headers={**headers, 'If-Match': if_match})
+
+
+def test_patch_accepts_row_version(client, admin_headers, user_id):
+    version = client.get(f'/api/users/{user_id}').get_json()['version']
+    response = _patch(client, user_id, admin_headers, f'"{version}"')
+    assert response.status_code == 200
+    assert response.get_json()['version'] == version + 1
+    assert _patch(client, user_id, admin_headers, response.headers['ETag']).status_code == 200
+
+
+def test_patch_accepts_get_etag(client, admin_headers, user_id):
+    etag = client.get(f'/api/users/{user_id}').headers['ETag']
+    assert etag.startswith('"users-')
+    assert _patch(client, user_id, admin_headers, etag).status_code == 200
+    # Any user write since moves the data version on
+    assert _patch(client, user_id, admin_headers, etag).status_code == 412
+
+
+def test_patch_accepts_encoded_etags(client, admin_headers, user_id):
+    body = client.get(f'/api/users/{user_id}').get_json()
+    etag = client.get(f'/api/users/{user_id}').headers['ETag']
+    assert _patch(client, user_id, admin_headers, f'"{body["version"]}-gzip"').status_code == 200
+    assert _patch(client, user_id, admin_headers, etag[:-1] + '-br"').status_code == 412
+
+
+def test_patch_stale_version_is_412(client, admin_headers, user_id):
+    version = client.get(f'/api/users/{user_id}').get_json()['version']
+    assert _patch(client, user_id, admin_headers, f'"{version}"').status_code == 200
+    assert _patch(client, user_id, admin_headers, f'"{version}"').status_code == 412
+
+
+@pytest.mark.parametrize('if_match', ['"abc"', '"tags-3"', '"users-x"'])
+def test_patch_unparseable_if_match_is_400(client, admin_headers, user_id, if_match):
+    assert _patch(client, user_id, admin_headers, if_match).status_code == 400
@@ -0,0 +1,83 @@
+import pytest
+from flask import Response, stream_with_context
+from app import db, exporter, querybudget
+from app.models import User
+from app.querybudget import QueryBudgetExceeded, query_budget
+from app.routes import generate_token
+
+# The testing config runs budgets in raise mode, so a view over its budget fails the request
+
+
+def _rows(count, prefix):
+    return [{'email': f'{prefix}{index}@example.com', 'name': f'User {index}', 'tags': 'python;react',
+             'availableDays': 'sat;fri'} for index in range(count)]
+
+
+@pytest.fixture
+def chunked_app(make_app):
+    return make_app(SAMPLE_USERS=True, IMPORT_CHUNK_SIZE=2, DELETE_CHUNK_SIZE=2)
+
+
+@pytest.fixture
+def headers(chunked_app):
+    with chunked_app.app_context():
+        admin = User.query.filter_by(email='admin@example.com').one()
+        return {'Authorization': f'Bearer {generate_token(admin.id)}'}
+
+
+def test_every_api_view_has_a_budget(app):
+    api_views = {endpoint for endpoint in app.view_functions if endpoint.startswith('api.')}
+    assert api_views <= set(querybudget.budgets(app))
+
+
+@pytest.mark.parametrize('query', ['', '?limit=5', '?tags=python&days=sat', '?fields=id,name,tags'])
+def test_list_within_budget(client, query):
+    assert client.get(f'/api/users{query}').status_code == 200
+
+
+def test_detail_within_budget(app, client):
+    with app.app_context():
+        user_id = db.session.execute(db.select(User.id).limit(1)).scalar()
+    assert client.get(f'/api/users/{user_id}').status_code == 200
+
+
+@pytest.mark.parametrize('rows', [1, 5])
+def test_import_budget_scales_with_chunks(chunked_app, headers, rows):
+    response = chunked_app.test_client().post('/api/users/import?returnUsers=1',
+                                              json={'data': _rows(rows, 'import')}, headers=headers)
+    assert response.status_code == 201
+    assert len(response.get_json()['users']) == rows
+
+
+def test_delete_budget_scales_with_chunks(chunked_app, headers):
+    client = chunked_app.test_client()
+    imported = client.post('/api/users/import?returnUsers=1', json={'data': _rows(5, 'delete')}, headers=headers)
+    user_ids = [user['id'] for user in imported.get_json()['users']]
+    response = client.post('/api/users/delete', json={'userIds': user_ids}, headers=headers)
+    assert response.get_json()['deleted'] == 5
+
+
+@pytest.mark.parametrize('batch_size', [1000, 2])
+def test_export_budget_counts_the_stream(chunked_app, headers, query_counter, monkeypatch, batch_size):
+    monkeypatch.setattr(exporter.csv_chunks, '__defaults__', (batch_size,))
+    with query_counter() as log:
+        response = chunked_app.test_client().get('/api/users/export', headers=headers)
+        response.get_data()
+    assert response.status_code == 200
+    # Users are read while the body streams, after the view has returned
+    assert log.count > 2
+
+
+def test_streamed_statements_count_against_the_budget(make_app):
+    app = make_app()
+
+    @app.route('/stream')
+    @query_budget(1)
+    def stream():
+        def numbers():
+            for _ in range(3):
+                yield str(db.session.execute(db.select(1)).scalar())
+        return Response(stream_with_context(numbers()))
+
+    with pytest.raises(QueryBudgetExceeded):
+        app.test_client().get('/stream').get_data()
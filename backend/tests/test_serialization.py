@@ -0,0 +1,19 @@
+import json
+import pytest
+from app.serialization import dumps_bytes
+
+
+def _stdlib(obj):
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode('ascii')
+
+
+@pytest.mark.parametrize('obj', [
+    {'text': ''.join(map(chr, range(128)))},
+    {'name': 'del\x7f', 'tags': ['a\x7fb']},
+    {'name': 'Zoë', 'line': ' '},
+    {'floats': [1e16, 0.00001, 1.5, -0.0]},
+    {'b': 1, 'a': [True, None, {'z': 'x', 'y': 2}]},
+    {1: 'int key'}
+])
+def test_matches_stdlib_bytes(obj):
+    assert dumps_bytes(obj) == _stdlib(obj)
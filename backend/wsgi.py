@@ -3,4 +3,4 @@ from app import create_app
 
 # Get the environment from system variable, default to production
 env = os.getenv('FLASK_ENV', 'production')
-app = create_app() 
\ No newline at end of file
+app = create_app(env) 
\ No newline at end of file
@@ -71,11 +71,18 @@ export default function Home() {
     const fetchUsers = async () => {
       setLoading(true);
       try {
-      const res = await fetch('http://127.0.0.1:5000/api/users');
-        if (!res.ok) {
-          throw new Error('Failed to fetch users');
-        }
-      const data = await res.json();
+        // The list is paginated: follow X-Next-Cursor until the last page
+        const data: any[] = [];
+        let cursor: string | null = null;
+        do {
+          const url = 'http://127.0.0.1:5000/api/users?limit=100' + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '');
+          const res = await fetch(url);
+          if (!res.ok) {
+            throw new Error('Failed to fetch users');
+          }
+          data.push(...await res.json());
+          cursor = res.headers.get('X-Next-Cursor');
+        } while (cursor);
         const processedUsers = data.map((user: any): User => ({
           id: user.id || '',
           email: user.email || '',